@@ -0,0 +1,88 @@
+"""
+    On-disk cache for the responses of GET requests made to Letterboxd
+    So that a page requested recently (e.g. a film's page) is read from disk rather than downloaded again
+"""
+
+# Data
+import datetime
+import json
+import sqlite3
+import time
+
+# Concurrency
+import threading
+
+# Web scraping
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class ResponseCache:
+    """
+    Stores responses in an sqlite database, keyed by the user they were requested as and their URL
+    So that pages which depend on who is logged in (e.g. friends' ratings) are never served to another user
+    Each entry expires after the period given when it was stored
+        but is kept, so that it can be revalidated with the server rather than downloaded again
+
+    Only what's needed to rebuild a response is stored (its status, headers, final url and content)
+    Not the request that was made for it, since its headers hold the session's cookies
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+
+        # The connection is shared between threads, so access to it is serialised by a lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "user TEXT, url TEXT, final_url TEXT, expires REAL, status INTEGER, reason TEXT, headers TEXT, encoding TEXT, content BLOB, "
+                "PRIMARY KEY (user, url))"
+            )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} ({self.file_path})"
+
+    def lookup(self, url: str, user: str) -> tuple[requests.Response | None, bool]:
+        """
+        Returns the response cached for the url and user (or None if there isn't one), and whether it is still fresh
+        An expired response is still returned, so that it can be revalidated (see LunaboxdSession.request)
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT final_url, expires, status, reason, headers, encoding, content FROM pages WHERE user = ? AND url = ?", (user, url)
+            ).fetchone()
+
+        if not row:
+            return None, False
+        final_url, expires, status, reason, headers, encoding, content = row
+
+        response = requests.Response()
+        # The url the request ended up at (e.g. after a redirect), as for a response that was just requested
+        response.url = final_url
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = encoding
+        response._content = content
+        return response, expires >= time.time()
+
+    def set(self, url: str, user: str, response: requests.Response, expire_after: datetime.timedelta) -> None:
+        """ Caches the response for the url and user until :expire_after: has passed """
+        expires = time.time() + expire_after.total_seconds()
+        # Any cookies the server set are left out too
+        headers = json.dumps({k: v for k, v in response.headers.items() if k.lower() != 'set-cookie'})
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (user, url, response.url, expires, response.status_code, response.reason, headers, response.encoding, response.content)
+            )
+
+    def clear(self, user: str | None = None) -> None:
+        """ Removes every response cached for the user (or for every user, if :user: isn't passed) """
+        with self._lock, self._connection:
+            if user is None:
+                self._connection.execute("DELETE FROM pages")
+            else:
+                self._connection.execute("DELETE FROM pages WHERE user = ?", (user,))
@@ -10,19 +10,29 @@ from session import LunaboxdSession
 import util
 
 # Web scraping
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import requests
 
 # Collections
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+# Concurrency
+from concurrent.futures import ThreadPoolExecutor
+
+# Caching
+from functools import cached_property, lru_cache
 
 # Type validation
-from typing import Self
+from typing import Any, Self
 
 # Data
+import datetime
+import json
 import re
 
 # Math
+import numpy as np
 from scipy.stats import beta # Used for bayesian average calculation
 
 # Debugging
@@ -39,30 +49,128 @@ console = Console(theme = util.style_theme)
 # --- Rich --- END
 
 
+# --- Patterns --- START
+
+# Compiled once per process rather than on every property access
+
+# Searched in the raw bytes of the main page, so the page is never decoded as a whole
+_PATTERN_FILMDATA = re.compile(rb"var filmData = \{(.*?)\};")
+
+# A string literal or an unquoted key of the filmData object - used to quote the keys so it can be read as JSON
+_PATTERN_FILMDATA_KEY = re.compile(r'("(?:\\.|[^"\\])*")|(\w+)(?=\s*:)')
+
+# A key: value pair of the filmData object, where value is a (possibly escaped) string or a number
+# Fallback for when the object isn't valid JSON once its keys are quoted
+_PATTERN_FILMDATA_FIELD = re.compile(r'(\w+): (?:"((?:\\.|[^"\\])*)"|([-\d.]+))')
+_PATTERN_ESCAPE = re.compile(r'\\(.)')
+_PATTERN_GENRE = re.compile(r"/films/genre/([-\w\s:]+)/")
+_PATTERN_FILM_URL = re.compile(r"https:\/\/letterboxd\.com\/film\/([^/]+)\/")
+_PATTERN_LENGTH = re.compile(r"([\d,]+)")
+_PATTERN_POSTER = re.compile(r'(?:"image":")(https://a.ltrbxd.com/[\/\d\w\-\.\?=]+)"')
+_PATTERN_FANS = re.compile(r"([\w\d\.]+) fans")
+_PATTERN_VIEWS = re.compile(r"(?:Watched by )([\d,]+)")
+_PATTERN_LISTS = re.compile(r"(?:Appears in )([\d,]+)")
+_PATTERN_LIKES = re.compile(r"(?:Liked by )([\d,]+)")
+_PATTERN_WEIGHTED_AVERAGE = re.compile(r"Weighted average of ([\d\.]+) based on")
+
+# Text of a friend's star rating, searched in the raw bytes of the fragment (e.g. <span class="rating -micro -darker rated-8"> ★★★★ </span>)
+_PATTERN_MICRO_RATING = re.compile(rb'<span class="(?:[^"]*\s)?-micro(?:\s[^"]*)?">([^<]+)</span>')
+
+@lru_cache(maxsize=None)
+def _pattern_tab_detail(pattern_substring: str) -> re.Pattern:
+    """ Returns the compiled pattern for links in the details tab (e.g. 'films/language') """
+    return re.compile(rf"(?:{pattern_substring}/)([-\w\s:]+)/")
+
+# --- Patterns --- END
+
+
+# --- Bayesian average --- START
+
+# Weight of each rating score (1-10) towards the 'up' and 'down' parameters of the beta distribution
+# Kept as integer numerators (i.e. multiplied by 9) so the sums are computed exactly
+_BAYES_WEIGHTS_UP = np.arange(0, 10)
+_BAYES_WEIGHTS_DOWN = 9 - _BAYES_WEIGHTS_UP
+
+@lru_cache(maxsize=8192)
+def _beta_ppf(up_ninths: int, down_ninths: int, a0: int) -> float:
+    """ 
+    Returns the 5th percentile of the beta distribution for the given 'up' and 'down' parameters
+    scipy's beta.ppf is slow, so results are cached
+        keyed on the exact integer numerators, so films with the same ratings share a result
+    """
+    return float(beta.ppf(0.05, up_ninths/9 + a0, down_ninths/9 + a0))
+
+# --- Bayesian average --- END
+
+
+# --- XPaths --- START
+
+# Compiled once, so each query runs in C without re-parsing the expression
+
+_has_class = letterboxd.has_class
+
+_XPATH_PAGE_WRAPPER = etree.XPath('//div[@id="film-page-wrapper"]')
+_XPATH_TAB_DETAILS = etree.XPath('//div[@id="tab-details"]')
+_XPATH_FILM_ID = etree.XPath(f'.//div[{_has_class("film-poster")}]/@data-film-id')
+_XPATH_SHORT_LINK = etree.XPath('//input[@id = $field_id]/@value')
+_XPATH_HEADLINE = etree.XPath(f'//h1[{_has_class("headline-1")}]')
+_XPATH_DESCRIPTION = etree.XPath(f'//div[{_has_class("review")}]')
+_XPATH_GENRE_HREFS = etree.XPath(f'//div[@id="tab-genres"]//a[{_has_class("text-slug")}]/@href')
+_XPATH_FOOTER = etree.XPath(f'.//p[{_has_class("text-link")} or {_has_class("text-footer")}]')
+_XPATH_ALTERNATIVE_TITLES = etree.XPath('.//h3[contains(., "Alternative Titles")]/following-sibling::div[1]//p')
+_XPATH_CREW_HREFS = etree.XPath('//div[@id="tab-crew"]//a/@href')
+_XPATH_TAB_CAST = etree.XPath('//div[@id="tab-cast"]')
+_XPATH_CAST = etree.XPath(f'.//div[{_has_class("cast-list")}]//a')
+_XPATH_HREFS = etree.XPath('.//a/@href')
+_XPATH_LD_JSON = etree.XPath('//script[@type="application/ld+json"]')
+_XPATH_BACKDROP = etree.XPath('//div[@id="backdrop"]/@data-backdrop')
+_XPATH_TWITTER_IMAGE = etree.XPath('//meta[@name="twitter:image"]/@content')
+_XPATH_TITLES = etree.XPath('//a/@title')
+
+# Icon classes of the links on the stats page, whose titles hold the views, lists and likes
+_STATS_ICONS = ('icon-watched', 'icon-list', 'icon-liked')
+
+def _first(results: list):
+    """ Returns the first result of an XPath query, or None if there were no results """
+    return results[0] if results else None
+
+# --- XPaths --- END
+
+
 @util.custom_repr
 class Film:
 
     # The prefix to the short_link to a film's page
     short_link_prefix = 'https://boxd.it/'
 
-    def __init__(self, path: str) -> None:
+    # How long a film's pages are cached on disk for
+    # So loading the same film again (e.g. when it appears in several lists) doesn't re-download them
+    cache_expiry = datetime.timedelta(days=3)
+
+    def __init__(self, path: str, load: bool = True) -> None:
         """
         > Parameters <
         --------------
         :path:
             the path to the film on Letterboxd (e.g. black-swan)
+        :load:
+            whether to get the film's soups now
+            if False, they must be got (e.g. with get_soups) before any attributes are accessed
         
         NOTE: sometimes, these paths have years in
         For example if there are two films named Boat, one may have the path boat,
         while the other may have the path boat-2013, representing the year of its release
         """
+        # The session is shared by all Films
+        # So they reuse the same pool of keep-alive connections to Letterboxd
         self.session = LunaboxdSession.load()
 
         # Path to the film
         self.path = letterboxd.string_to_suburl(path)
 
         # Get the soups from which information about the film can be extracted
-        self.get_soups()
+        if load:
+            self.get_soups()
 
     @classmethod
     def from_id(cls, film_id: int) -> Self:
@@ -84,24 +192,50 @@ class Film:
         Return an instance of Film given that film's URI
             (the unique characters in its short link)
         """
-        response = requests.get(f"{cls.short_link_prefix}{film_uri}")
-        pattern = r"https:\/\/letterboxd\.com\/film\/([^/]+)\/"
-        suburl = util.find_one(pattern, response.url)
+        # Through the shared session, which follows the short link's redirect to the film's page
+        response = LunaboxdSession.load().request('GET', f"{cls.short_link_prefix}{film_uri}")
+        suburl = util.find_one(_PATTERN_FILM_URL, response.url)
         return cls(path = suburl)
 
-    def __str__(self):
+    @classmethod
+    def batch(cls, paths: list[str], max_workers: int = 8, all_pages: bool = False) -> list[Self]:
+        """
+        ** Alternative Constructor **
+        Return a list of Films, one for each path, loaded concurrently
 
-        # --- Define functions frequently used in string ---
+        Each film's pages are parsed (in to trees) by the thread that fetched them, as soon as they arrive
+        NOTE: attributes are still scraped from the trees lazily, when they are first accessed
 
-        # Round integer to 2 decimal places
-        dp_two = lambda x: f"{x:.2f}" if isinstance(x, int|float) else x
-        
-        # Display a shortened version of the array if necessary
-        preview_arr = util.preview_array
+        > Parameters <
+        --------------
+        :paths:
+            the paths to the films on Letterboxd (e.g. ['black-swan', 'boat-2013'])
+        :max_workers:
+            how many films are fetched at once
+            NOTE: each film requests its four pages concurrently too,
+                so the default keeps the total within the session's connection pool
+        :all_pages:
+            whether to request each film's stats and rating pages now too (see get_soups)
+
+        > Returns <
+        -----------
+        The Films, in the same order as paths
+        """
+        films = [cls(path, load=False) for path in paths]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # (list() raises any exception from the fetching or parsing)
+            list(executor.map(lambda film: film.parse_responses(film.fetch_responses(all_pages)), films))
 
-        # Display numbers with a comma as 1,000 separator
+        return films
+
+    def __str__(self):
+
+        # Aliases for utility functions
+        dp_two = letterboxd.dp_two
+        preview_arr = util.preview_array
         thous_sep = util.thousand_separator
-        
+
         # --- Return string ---
 
         return f'''\
@@ -211,49 +345,140 @@ class Film:
     ** Soup Getters
     """
 
-    def get_soups(self) -> None:
+    def get_soups(self, all_pages: bool = False) -> None:
         """ 
         Updates/Sets the instance variables that store soup related to the film
         From which film information is scraped
+
+        > Parameters <
+        --------------
+        :all_pages:
+            whether to request the stats and rating pages now too (concurrently with the main page)
+            if False, each is only requested when an attribute scraped from it is first accessed
         """
+        self.parse_responses(self.fetch_responses(all_pages))
 
-        quick_soup = lambda response: BeautifulSoup(response.text, 'lxml')
-
-        def get_soup_main() -> BeautifulSoup:
-            response = self.session.request('GET', self.suburl_film_main)
-            
-            response_suburl = response.url.replace(f"{self.session.URL_MAIN}film/", '').rstrip('/')
-            
-            # The request was redirected - so set the path to the redirected url
-            if response_suburl != self.path:
-                logging.debug(f"Request was redirected. Changing path\nBefore: {self.path}\nAfter: {response_suburl}")
-                self.path = response_suburl
-            
-            return quick_soup(response)
-
-        def get_soup_stats() -> BeautifulSoup:
-            response = self.session.request('GET', self.suburl_film_stats)
-            return quick_soup(response)
-
-        def get_soup_rating() -> BeautifulSoup:
-            response = self.session.request('GET', self.suburl_film_rating)
-            return quick_soup(response)
-
-        def get_soup_rating_friends() -> BeautifulSoup:
-            response = self.session.request('GET', self.suburl_film_rating_friends)
-            return quick_soup(response)
+    def fetch_responses(self, all_pages: bool = False) -> list[requests.Response]:
+        """ 
+        Requests the film's pages, which are parsed by parse_responses
         
+        > Returns <
+        -----------
+        The response for the main page, 
+            followed by those for the stats, rating and friends' rating pages if :all_pages:
+        """
+        if not all_pages:
+            response_main = self._get_page(self.suburl_film_main)
+            self._follow_redirect(response_main)
+            return [response_main]
+
+        # The four pages are independent of one another, so request them concurrently
+        # (the GIL is released while waiting on the network)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            future_main = executor.submit(self._get_page, self.suburl_film_main)
+            futures_other = [executor.submit(self._get_page, i) for i in self._suburls_other]
+
+            response_main = future_main.result()
+
+            # The other pages were requested using the old path - so request them again
+            if self._follow_redirect(response_main):
+                futures_other = [executor.submit(self._get_page, i) for i in self._suburls_other]
+
+            return [response_main, *(i.result() for i in futures_other)]
+
+    def _follow_redirect(self, response_main: requests.Response) -> bool:
+        """ 
+        If the request for the main page was redirected, sets the path to the redirected url
+        Returns True if it was redirected, else False
+        """
+        response_suburl = response_main.url.replace(f"{self.session.URL_MAIN}film/", '').rstrip('/')
+        if response_suburl == self.path:
+            return False
+        logging.debug(f"Request was redirected. Changing path\nBefore: {self.path}\nAfter: {response_suburl}")
+        self.path = response_suburl
+        return True
+
+    def parse_responses(self, responses: list[requests.Response]) -> None:
+        """ 
+        Sets the instance variables that store soup related to the film from the responses of fetch_responses
+        No requests are made, so this can run on a separate thread to the fetching
+        """
+        # Attributes scraped from the previous soups are now out of date
+        util.clear_cached_properties(self)
+
+        response_main, *responses_other = responses
+
         # Main attributes for the film - year, genre, crew, etc.
-        self.soup_main = get_soup_main()
+        self.soup_main = letterboxd.make_tree(response_main)
+        self._main_html = response_main.content
 
-        # Views, Lists, Likes
-        self.soup_stats = get_soup_stats()
-        
-        # Film's rating
-        self.soup_rating = get_soup_rating()
-        
-        # Film's rating by your friends
-        self.soup_rating_friends = get_soup_rating_friends()
+        if responses_other:
+            self._parse_responses_other(*responses_other)
+
+    def prefetch_all(self) -> None:
+        """ 
+        Requests the stats and rating pages concurrently
+        Rather than one after another as attributes scraped from them are accessed
+        """
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            responses_other = list(executor.map(self._get_page, self._suburls_other))
+        self._parse_responses_other(*responses_other)
+
+    def _parse_responses_other(self, response_stats, response_rating, response_rating_friends) -> None:
+        """ Sets the soups of the pages besides the main page, so they aren't requested lazily """
+        self.stats_titles = self._get_stats_titles(response_stats)
+        self.soup_rating = letterboxd.make_tree(response_rating)
+        self._rating_friends_html = response_rating_friends.content
+
+    def _get_page(self, suburl: str) -> requests.Response:
+        """ GET request for one of the film's pages, using the response cache """
+        return self.session.request('GET', suburl, expire_after=self.cache_expiry)
+
+    @property
+    def _suburls_other(self) -> tuple[str, str, str]:
+        """ The suburls of the pages besides the main page """
+        return (self.suburl_film_stats, self.suburl_film_rating, self.suburl_film_rating_friends)
+
+    """
+    ** Lazy Soups
+
+    The pages besides the main page are only needed for some attributes
+    So each is requested when first needed, unless already got by get_soups(all_pages=True) or prefetch_all
+    """
+
+    @cached_property
+    def stats_titles(self) -> dict[str, str]:
+        """ Views, Lists, Likes """
+        return self._get_stats_titles(self._get_page(self.suburl_film_stats))
+
+    @cached_property
+    def soup_rating(self) -> lxml.html.HtmlElement:
+        """ Film's rating """
+        return letterboxd.make_tree(self._get_page(self.suburl_film_rating))
+
+    @cached_property
+    def _rating_friends_html(self) -> bytes:
+        """ 
+        Film's rating by your friends
+        Only the friends' star ratings are needed from this fragment, so it isn't parsed into a tree
+        """
+        return self._get_page(self.suburl_film_rating_friends).content
+
+    @staticmethod
+    def _get_stats_titles(response: requests.Response) -> dict[str, str]:
+        """ 
+        Returns the titles of the stats page's links (e.g. 'Watched by 1,234 members'), keyed by their icon class
+        The page is only a small fragment and just these three links are needed,
+            so it is stream-parsed, stopping as soon as all three have been found
+        """
+        titles = {}
+        for a in letterboxd.iter_elements(response, 'a'):
+            classes = (a.get('class') or '').split()
+            if (icon := next((i for i in _STATS_ICONS if i in classes), None)):
+                titles[icon] = a.get('title')
+                if len(titles) == len(_STATS_ICONS):
+                    break
+        return titles
 
     """
     ** Soup Magnifiers
@@ -262,23 +487,40 @@ class Film:
     So I made properties for convenience's sake
     """
 
-    @property
-    def soup_main_pageWrapper(self) -> BeautifulSoup:
+    @cached_property
+    def soup_main_pageWrapper(self) -> lxml.html.HtmlElement:
         """ Used for getting the film's id_ and length """
-        return self.soup_main.select_one('div#film-page-wrapper')
+        return _first(_XPATH_PAGE_WRAPPER(self.soup_main))
 
-    @property
-    def soup_main_filmData(self) -> BeautifulSoup:
+    @cached_property
+    def soup_main_filmData(self) -> str:
         """ Used for getting the film's name and year """
-        pattern = re.compile(r"var filmData = \{(.*?)\};")
-        script = self.soup_main.find('script', text=pattern)
-        filmData = pattern.search(script.text).group(1).strip()
+        # The script is inline in the page, so search the raw HTML rather than walking the tree
+        filmData = _PATTERN_FILMDATA.search(self._main_html).group(1).decode().strip()
         return filmData
 
-    @property
-    def soup_main_tabDetails(self) -> BeautifulSoup:
+    @cached_property
+    def soup_main_filmData_fields(self) -> dict[str, Any]:
+        """ 
+        The fields of the filmData object (e.g. name, releaseYear), parsed once
+            Example: {'id': 51568, 'name': 'Black Swan', 'releaseYear': '2010', ...}
+        """
+        # The object is a JS literal whose keys are unquoted - quote them (leaving string values as they are)
+        quote_key = lambda m: m.group(1) or f'"{m.group(2)}"'
+        try:
+            return json.loads(f"{{{_PATTERN_FILMDATA_KEY.sub(quote_key, self.soup_main_filmData)}}}")
+        except json.JSONDecodeError:
+            logging.debug(f"filmData for {self.path} is not valid JSON. Falling back to regex")
+
+        return {
+            key: json.loads(number) if number else _PATTERN_ESCAPE.sub(r'\1', string)
+            for key, string, number in _PATTERN_FILMDATA_FIELD.findall(self.soup_main_filmData)
+        }
+
+    @cached_property
+    def soup_main_tabDetails(self) -> lxml.html.HtmlElement:
         """ Used for getting the film's language, studio, etc. """
-        return self.soup_main.select_one('div#tab-details')
+        return _first(_XPATH_TAB_DETAILS(self.soup_main))
 
     """
     ** Actions
@@ -319,7 +561,7 @@ class Film:
 
     def action_rate(self, rating:int) -> None:
         """ Give the film a rating (1-10) | 0 to remove rating """
-        if not (isinstance(rating, int) & rating in range(0,11)):
+        if not isinstance(rating, int) or not 0 <= rating <= 10:
             raise ValueError(f"Invalid rating: {rating}")
         self._action('rate', data={'rating': rating})
 
@@ -335,20 +577,20 @@ class Film:
     ** Film attributes **
     """
 
-    @property
+    @cached_property
     def id_(self) -> int:
         """ Returns the film's id """
-        return int(self.soup_main_pageWrapper.find('div', class_='film-poster').get('data-film-id'))
+        return int(_XPATH_FILM_ID(self.soup_main_pageWrapper)[0])
 
-    @property
+    @cached_property
     def short_link(self) -> str:
         """ Gets the short link to a film's page """
-        short_link = self.soup_main.find('input', id=f'url-field-{self.id_}').get('value')
+        short_link = _XPATH_SHORT_LINK(self.soup_main, field_id=f'url-field-{self.id_}')[0]
         if self.short_link_prefix not in short_link:
             raise LunaboxdError(f"Unexpected short_url: {short_link}\nMissing prefix: {self.short_link_prefix}")
         return short_link
         
-    @property
+    @cached_property
     def uri(self) -> str:
         """ Extract the URI from the short_link """
         return self.short_link.replace(self.short_link_prefix, '')
@@ -358,62 +600,57 @@ class Film:
         """ Returns the full URL of the film """
         return f"{self.session.URL_MAIN}{self.suburl_film_main}"
 
-    @property
+    @cached_property
     def name(self) -> str:
         """ Returns the film's title """
-        pattern = r"name: \"(.*?)\","
-        match = util.find_one(pattern, self.soup_main_filmData)
+        match = self.soup_main_filmData_fields.get('name')
         if not match: raise LunaboxdError(f"Could not get film_name for {self.path}")
-        return match.replace('\\', '')
+        return match
     
-    @property
+    @cached_property
     def pretty_name(self) -> str:
         """ Returns the title of the film """
-        title = self.soup_main.find('h1', class_='headline-1').text
+        title = _XPATH_HEADLINE(self.soup_main)[0].text_content()
         return util.from_xml_char_reference(title)
 
-    @property
+    @cached_property
     def description(self) -> str:
         """ Returns the film's description """
-        description = self.soup_main.find("div", class_="review")
-        if not description: return ''
-        return ''.join([i.text for i in description.find_all('p')]).strip()
+        description = _first(_XPATH_DESCRIPTION(self.soup_main))
+        if description is None: return ''
+        return ''.join([i.text_content() for i in description.iter('p')]).strip()
 
     def description_short(self, max_chars: int = 250) -> str:
         """ Return a shorter version of the description if the description length exceeds :max_chars: """
         return util.truncate_string(self.description, max_chars)
 
-    @property
+    @cached_property
     def year(self) -> int:
         """ Return's the film's release year, if one exists. Otherwise returns None """
-        pattern = r'(?:releaseYear: ")(\d{4})'
-        match = re.findall(pattern, self.soup_main_filmData)
-        return int(match[0]) if match else None
+        match = str(self.soup_main_filmData_fields.get('releaseYear', ''))
+        return int(match) if len(match) == 4 and match.isdigit() else None
 
-    @property
+    @cached_property
     def genres(self) -> list[str]:
         """ Returns the genres a film has """
-        tab_genres = self.soup_main.find('div', id='tab-genres')
-        
         # Get the genre name of each genre_link on the film page
-        pattern = r"/films/genre/([-\w\s:]+)/"
-        genre_links = tab_genres.find_all('a', class_='text-slug', attrs={'href': re.compile(pattern)})
-        return sorted([util.find_one(pattern, link.get('href')).title() for link in genre_links])
+        # (matching each link only once)
+        matches = (_PATTERN_GENRE.search(href) for href in _XPATH_GENRE_HREFS(self.soup_main))
+        return sorted(match.group(1).title() for match in matches if match)
 
-    @property
+    @cached_property
     def is_short(self) -> bool:
         """ Returns True if the film is considered a short_film by Letterboxd """
         return len(self) < 40
 
-    @property
+    @cached_property
     def length(self) -> int:
         """ Returns the length of the film in minutes """
-        footer = self.soup_main_pageWrapper.find('p', class_=['text-link', 'text-footer'])
-        pattern = r"([\d,]+)"
-        match = util.find_one(pattern, footer.text).replace(',', '')
+        footer = _XPATH_FOOTER(self.soup_main_pageWrapper)[0]
+        match = util.find_one(_PATTERN_LENGTH, footer.text_content()).replace(',', '')
         return int(match) if match else None
 
-    @property
+    @cached_property
     def language(self) -> list[str]:
         results = self._get_tab_detail('films/language')
         
@@ -421,22 +658,24 @@ class Film:
         # Why? E.g. Black Swan lists English twice (as original language and spoken language)
         return list(set(results))
 
-    @property
+    @cached_property
     def alternative_titles(self) -> list[str]:
-        if not (title_header := self.soup_main_tabDetails.find('h3', text='Alternative Titles')):
+        if (tab_details := self.soup_main_tabDetails) is None:
             return list()
 
-        # Get the text for alternative titles
-        text = title_header.select_one('h3:contains("Alternative Titles") + div p')
+        # Get the text for alternative titles (the paragraph following the 'Alternative Titles' header)
+        if (p := _first(_XPATH_ALTERNATIVE_TITLES(tab_details))) is None:
+            return list()
+        text = p.text_content()
 
         # They are split by commas, so split them by such when converting to a list
-        return [] if not text else text.split(',')
+        return [] if not text else [i.strip() for i in text.split(',')]
 
-    @property
+    @cached_property
     def region(self) -> list[str]:
         return self._get_tab_detail('films/country')
 
-    @property
+    @cached_property
     def crew(self) -> dict:
         """ 
         Returns a dict containing the crew of a film
@@ -444,161 +683,150 @@ class Film:
         Example:
             {'Director': ['Tommy Wiseau'], 'Producers': ['Tommy Wiseau', 'Drew Caffrey', ...], ...}
         """
-        tab_crew = self.soup_main.find('div', id='tab-crew')
-
-        if not tab_crew: return {}
-
-        hrefs = [i.get('href') for i in tab_crew.find_all('a')]
+        if not (hrefs := _XPATH_CREW_HREFS(self.soup_main)): return {}
         
         ## Build a dictionary of crew members
+        # A defaultdict, so roles the film has no crew for are empty (e.g. crew['Writer'])
         crew = defaultdict(list)
-        def get_crew_member(href):
-            role, *person = href.split('/')[1:]
-            role = role.title()
-            person = '/'.join(person).rstrip('/').replace('-', ' ').title()
-            crew[role].append(person)
-        [get_crew_member(i) for i in hrefs]
+        for href in hrefs:
+            # e.g. '/director/darren-aronofsky/' -> ('', 'director', 'darren-aronofsky/')
+            _, role, person = href.split('/', 2)
+            crew[role.title()].append(person.rstrip('/').replace('-', ' ').title())
         
         return crew
 
-    @property
+    @cached_property
     def cast(self) -> list[str]:
         """ Returns a list containing the cast of a film. """
-        tab_cast = self.soup_main.find('div', id='tab-cast')
-        if not tab_cast: return []
-        cast_list = tab_cast.find('div', class_='cast-list')
-        return [i.text for i in cast_list.find_all('a')]
+        tab_cast = _first(_XPATH_TAB_CAST(self.soup_main))
+        if tab_cast is None: return []
+        return [i.text_content() for i in _XPATH_CAST(tab_cast)]
 
-    @property
+    @cached_property
     def studio(self):
         return self._get_tab_detail('studio')
 
     ## Util
 
     def _get_tab_detail(self, pattern_substring) -> list:
-        if not (tab_details := self.soup_main_tabDetails):
+        if (tab_details := self.soup_main_tabDetails) is None:
             # The tab does not exist - the information does not either
             return list()
 
-        pattern = rf"(?:{pattern_substring}/)([-\w\s:]+)/"
-        if not (links := tab_details.find_all('a', attrs={'href': re.compile(pattern)})):
+        pattern = _pattern_tab_detail(pattern_substring)
+        if not (links := [i for i in _XPATH_HREFS(tab_details) if pattern.search(i)]):
             # Does not have a link containing data - the information is missing
             return list()
 
         # Return the first (only) match
-        return [util.find_one(pattern, link.get('href')) for link in links]
+        return [util.find_one(pattern, link) for link in links]
 
     """
     ** Images **
     """
 
-    @property
+    @cached_property
     def img_poster(self) -> str:
         """ Returns the URL for the poster if available, else None """
-        script = self.soup_main.find('script', attrs={'type': 'application/ld+json'})
-        pattern = r'(?:"image":")(https://a.ltrbxd.com/[\/\d\w\-\.\?=]+)"'
-        return util.find_one(pattern, script.text)
+        script = _XPATH_LD_JSON(self.soup_main)[0]
+        return util.find_one(_PATTERN_POSTER, script.text)
 
-    @property
+    @cached_property
     def img_banner(self) -> str:
         """ Returns the URL of the banner if available, else None """
-        div = self.soup_main.find('div', id='backdrop')
-        if not div: return None
-        return div.get('data-backdrop')
+        return _first(_XPATH_BACKDROP(self.soup_main))
 
-    @property
+    @cached_property
     def img_twitter(self) -> str:
         """ Returns the URL of the film's twitter image """
-        return self.soup_main.find('meta', attrs={'name': 'twitter:image'}).get('content')
+        return _XPATH_TWITTER_IMAGE(self.soup_main)[0]
         
     """
     ** User interactions **
     """
 
-    @property
+    @cached_property
     def fans(self):
         """ 
         Returns the number of fans a film has on Letterboxd
             NOTE: this figure is rounded
         """
-        pattern = r"([\w\d\.]+) fans"
-        match = util.find_one(pattern, self.soup_rating.text)
+        match = util.find_one(_PATTERN_FANS, self.soup_rating.text_content())
         return letterboxd.shortnum_to_int(match) if match else 0
 
-    @property
+    @cached_property
     def views(self):
-        title = self.soup_stats.find('a', class_='icon-watched').get('title')
-        pattern = r"(?:Watched by )([\d,]+)"
-        return int(util.find_one(pattern, title).replace(',', ''))
+        title = self.stats_titles['icon-watched']
+        return int(util.find_one(_PATTERN_VIEWS, title).replace(',', ''))
 
-    @property
+    @cached_property
     def lists(self):
-        title = self.soup_stats.find('a', class_='icon-list').get('title')
-        pattern = r"(?:Appears in )([\d,]+)"
-        return int(util.find_one(pattern, title).replace(',', ''))
+        title = self.stats_titles['icon-list']
+        return int(util.find_one(_PATTERN_LISTS, title).replace(',', ''))
 
-    @property
+    @cached_property
     def likes(self):
-        title = self.soup_stats.find('a', class_='icon-liked').get('title')
-        pattern = r"(?:Liked by )([\d,]+)"
-        return int(util.find_one(pattern, title).replace(',', ''))
+        title = self.stats_titles['icon-liked']
+        return int(util.find_one(_PATTERN_LIKES, title).replace(',', ''))
 
     """
     ** Ratings **
     """
 
-    @property
+    @cached_property
     def has_letterboxd_rating(self) -> bool:
         return self.ratings_number_of >= 30
 
-    @property
+    @cached_property
     def ratings(self) -> dict:
-        soup = self.soup_rating
-
-        def get_rating(i):
+        """ 
+        Returns the number of ratings the film has received for each score (1-10)
+        Built in a single pass over the histogram links
+        """
+        # Scores without a link have received no ratings
+        ratings_dict = {int(k*2): 0 for k in letterboxd.RATINGS_RANGE}
 
-            # Get the star_rating that corresponds to the i (e.g. 2.5 -> ★★½)
-            star_rating = 'half-★' if i == 0.5 else letterboxd.num_to_star_rating(i)
-            
-            # Match any links with the exact star rating score of i
-            link = soup.find('a', title=re.compile(fr"[^{letterboxd.RATING_STAR}{letterboxd.RATING_HALF}-]{star_rating} rating"))
-            
-            # If not found, no ratings for this score
-            if not link: return 0
+        for title in _XPATH_TITLES(self.soup_rating):
+            if not (match := letterboxd.PATTERN_RATING_TITLE.search(title)):
+                continue
+            quantity, star_rating = match.groups()
+            ratings_dict[int(letterboxd.star_rating_to_num(star_rating) * 2)] = int(quantity.replace(',', ''))
 
-            # Return the number of ratings for this score
-            return int(link.get('title').split()[0].replace(',', ''))
-        
-        ratings_dict = {int(k*2):get_rating(k) for k in letterboxd.RATINGS_RANGE}
         return ratings_dict
 
+    @cached_property
+    def _ratings_totals(self) -> tuple[int, int]:
+        """ Computes the number of ratings and the combined score of all ratings together, in one pass """
+        number_of, total_score = 0, 0
+        for score, quantity in self.ratings.items():
+            number_of += quantity
+            total_score += score * quantity
+        return number_of, total_score
+
     @property
     def ratings_number_of(self) -> int:
         """ Returns the total number of ratings the film has received from users """
-        return sum(self.ratings.values())
+        return self._ratings_totals[0]
 
     @property
     def _ratings_total_score(self):
         """ Computes the combined score of all ratings """
-        if not self.ratings_number_of: 
-            return 0
-        return sum([s*q for s,q in self.ratings.items()]) 
+        return self._ratings_totals[1]
 
     ## Ways of calculating overall score
 
-    @property
+    @cached_property
     def rating_letterboxd(self) -> float|None:
         """ Return the ratings_score a film has been assigned by Letterboxd. """
         # Not enough ratings to be given an overall ratings score by Letterboxd
         if not self.has_letterboxd_rating: 
             return None
 
-        pattern = r"Weighted average of ([\d\.]+) based on"
-        title = self.soup_rating.find('a', attrs={'title': re.compile(pattern)}).get('title')
-        # Worry not about KeyError because films w/o letterboxd_rating already returned None
-        return float(re.findall(pattern, title)[0])
+        # Worry not about StopIteration because films w/o letterboxd_rating already returned None
+        match = next(m for t in _XPATH_TITLES(self.soup_rating) if (m := _PATTERN_WEIGHTED_AVERAGE.search(t)))
+        return float(match.group(1))
 
-    @property
+    @cached_property
     def rating_true(self) -> int | float:
         """ Returns the true mean average rating score """
         if not (rat_num := self.ratings_number_of):
@@ -606,26 +834,27 @@ class Film:
             return None
         return (self._ratings_total_score / rat_num) * 0.5
 
-    @property
+    @cached_property
     def rating_bayesian(self):
         """ Returns bayesian average rating score"""
         return self._get_bayesian_average(self.ratings, no_rating_fallback=letterboxd.RATING_MIDDLE)
 
     ## Friends' ratings
 
-    @property
+    @cached_property
     def ratings_friends(self):
-        results = [i.text for i in self.soup_rating_friends.find_all('span', class_='-micro')]
-        friends_ratings = [letterboxd.star_rating_to_num(i) for i in results]
-        return {i: friends_ratings.count(i/2) for i in range(1, 11)}
+        results = _PATTERN_MICRO_RATING.findall(self._rating_friends_html)
+        # Counted in one pass, keyed by score (1-10)
+        friends_ratings = Counter(int(letterboxd.star_rating_to_num(i.decode().strip()) * 2) for i in results)
+        return {i: friends_ratings[i] for i in range(1, 11)}
 
-    @property
+    @cached_property
     def rating_friends_bayesian(self):
         return self._get_bayesian_average(self.ratings_friends, no_rating_fallback=None)
 
     ## Misc.
 
-    @property
+    @cached_property
     def rating_ironic(self) -> bool:
         """
         Judge if a film has 'ironic-rating' (i.e. people are giving high scores as a joke)
@@ -635,7 +864,7 @@ class Film:
         minimum_number_of_ratings = 3
 
         return all((
-            sorted([util.key_max(ratings), util.key_max(ratings, 2)]) == [1,10],
+            sorted(util.key_max(ratings, 2, multiple_maxes=True)) == [1,10],
             ratings[1] >= minimum_number_of_ratings,
             ratings[10] >= minimum_number_of_ratings
         ))
@@ -651,9 +880,10 @@ class Film:
         if not d or not any (d.values()): 
             return no_rating_fallback
 
-        up = sum([d[n] * ((n-1)/9) for n in range(1,11)])
-        down = sum([d[n] * ((9-(n-1))/9) for n in range(1,11)])
-        return ( beta.ppf(0.05, up + a0, down + a0)  *4.5 ) + 0.5
+        counts = np.fromiter((d[n] for n in range(1,11)), dtype=np.int64, count=10)
+        up_ninths = int(counts @ _BAYES_WEIGHTS_UP)
+        down_ninths = int(counts @ _BAYES_WEIGHTS_DOWN)
+        return ( _beta_ppf(up_ninths, down_ninths, a0)  *4.5 ) + 0.5
 
 
 # Testing code
@@ -10,11 +10,17 @@ import letterboxd
 import util
 
 # Data
+import datetime
 import math
 import re
 
+# Collections
+from itertools import chain, islice
+from typing import Iterator
+
 # Web scraping
-from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
+from lxml import etree
 
 # Type validation
 import requests
@@ -23,6 +29,38 @@ import requests
 import logging
 
 
+# --- Patterns --- START
+
+# Compiled once per process rather than for every result
+_PATTERN_FILM_YEAR = re.compile(r"/films/year/\d{4}/")
+_PATTERN_FILM_LINK = re.compile(r"(?:/film/)([\w\d-]+)/")
+
+# --- Patterns --- END
+
+
+# --- XPaths --- START
+
+_has_class = letterboxd.has_class
+
+_XPATH_LIST_NAME = etree.XPath(f'.//h2[{_has_class("title-2")} and {_has_class("prettify")}]')
+
+# --- XPaths --- END
+
+
+def _iter_results(source: requests.Response | lxml.html.HtmlElement, tag: str, class_name: str):
+    """ 
+    Yields each :tag: element with the class :class_name: in the results list of a page
+    (see letterboxd.iter_elements for :source:)
+
+    Each result (li) of the list is iterated over, so a result is only cleared once all of it has been read
+    """
+    has_class = lambda element, name: name in (element.get('class') or '').split()
+    for li in letterboxd.iter_elements(source, 'li'):
+        if (ul := li.getparent()) is None or ul.tag != 'ul' or not has_class(ul, 'results'):
+            continue
+        yield from (element for element in li.iter(tag) if has_class(element, class_name))
+
+
 @util.custom_repr
 class Find:
     """
@@ -40,18 +78,22 @@ class Find:
     # Number of results per page - static variable
     RESULTS_PER_PAGE = 20
 
+    # How long a page of results is cached on disk for
+    # So repeating a search (e.g. UserInfo.from_display_names) doesn't download it again
+    cache_expiry = datetime.timedelta(hours=1)
+
     def __init__(self) -> None:
         self.session = LunaboxdSession.load()
 
-    def _get_soup(self, query: str, search_category: str) -> requests.Response:
+    def _get_first_page(self, query: str, search_category: str) -> requests.Response | None:
+        """ Returns the response for the first page of results, or None if there are no results """
         full_url = self.make_substring(query, search_category)
         try:
-            response = self.session.request('GET', full_url)
+            response = self.session.request('GET', full_url, expire_after=self.cache_expiry)
         except PageNotFound:
             # No results
             return None
-        else:
-            return response
+        return response if response else None
 
     def _get_results(self, query: str, search_category: str, limit: int | None) -> list[dict]:
         """
@@ -61,43 +103,30 @@ class Find:
         -------------
         self.__call__()
         """
-        if not (response := self._get_soup(query, search_category)):
+        if (response := self._get_first_page(query, search_category)) is None:
             # No results
             return []
 
         # Identify the page to stop at
-        soup = BeautifulSoup(response.text, 'lxml')
+        # (The last page is read from the raw bytes of the first page, so it needn't be parsed in full)
+        last_page = letterboxd.get_last_page(response)
         page_stop = min (
-            letterboxd.get_last_page(soup), # Last page
+            last_page, # Last page
             math.ceil(limit / self.RESULTS_PER_PAGE) # Page based on limit set
-        ) if limit else letterboxd.get_last_page(soup) # If no limit just get last available page
-
-        results = list()
-        page_current = 1
+        ) if limit else last_page # If no limit just get last available page
 
         # Get the appropriate scraper method depending on search category - this will be executed for each page
         get_page_func = self.get_page_methods[search_category]
 
-        while True:
-            ul = BeautifulSoup(response.text, 'lxml', parse_only=SoupStrainer('ul', class_='results'))
-            results_on_page = get_page_func(ul)
-
-            # Add the results_on_page to results
-            results.extend(results_on_page)
+        # The first page has already been requested
+        # The number of pages is now known, so the rest can be requested at once
+        suburls_other = [self.make_substring(query, search_category, page_num = i) for i in range(2, page_stop + 1)]
+        responses_other = self.session.request_many('GET', suburls_other, expire_after=self.cache_expiry)
 
-            if page_current == page_stop:
-                break
-            
-            else:
-                # Otherwise get response for next page
-                page_current += 1
-                full_url = self.make_substring(query, search_category, page_num = page_current)
-                response = self.session.request('GET', full_url)
-
-        # Strip results so that they do not exceed the limit
-        # E.g. if the limit was 105, and there are 20 results per page, the 6th page would still be scraped
-        #   In that case this would strip the last 15 results, taking the number from 120 to 105
-        return results[:limit] if limit else results
+        # Every page is stream-parsed, and results are scraped lazily, so scraping stops as soon as the limit is reached
+        #   E.g. if the limit was 105, and there are 20 results per page, only 5 results of the 6th page are scraped
+        results = chain.from_iterable(get_page_func(source) for source in (response, *responses_other))
+        return list(islice(results, limit)) if limit else list(results)
 
     def __call__(self, query: str, search_category: str, limit: int = 20) -> list[dict]:
         """
@@ -129,65 +158,66 @@ class Find:
         return self._get_results(query, search_category, limit)
 
     """
-    ** Methods for scraping data given a ul tag containing a result
+    ** Methods for scraping data given a page of results
+        - either the response, which is stream-parsed, or its tree if it has already been parsed
+        - results are yielded one at a time, so the caller can stop once it has enough
     """
 
     @staticmethod
-    def _get_page_members(ul) -> list[dict]:
+    def _get_page_members(source: requests.Response | lxml.html.HtmlElement) -> Iterator[dict]:
         """
         Get a page of Letterboxd search results for members
         """
-        get_display_name = lambda i:i.text.strip()
-        get_usernmae = lambda i:i.get('href').strip('/')
-        return [
+        return (
             {
-                'username': get_usernmae(i),
-                'display_name': get_display_name(i)
-            } for i in ul.find_all('a', class_='name')
-        ]
+                'username': a.get('href').strip('/'),
+                'display_name': a.text_content().strip()
+            } for a in _iter_results(source, 'a', 'name')
+        )
 
     @staticmethod
-    def _get_page_films(ul) -> list[dict]:
+    def _get_page_films(source: requests.Response | lxml.html.HtmlElement) -> Iterator[dict]:
         """
         Get a page of Letterboxd search results for films
         """
-
-        pattern = r"(?:/film/)([\w\d-]+)/"
-        get_name = lambda i:i.find('a').text.rstrip(i.find('a', attrs={'href': re.compile(r"/films/year/\d{4}/")}).text).strip()
-        get_link = lambda i:re.findall(pattern, i.find('a').get('href'))[0]
-        return [
+        def get_name(span):
+            name = span.find('.//a').text_content()
+            # Remove the year of release, which follows the name
+            year = next((a for a in span.iter('a') if _PATTERN_FILM_YEAR.search(a.get('href', ''))), None)
+            return (name.rstrip(year.text_content()) if year is not None else name).strip()
+
+        get_link = lambda span:_PATTERN_FILM_LINK.search(span.find('.//a').get('href')).group(1)
+        return (
             {
-                'name': get_name(i),
-                'link': get_link(i)
-            } for i in ul.find_all('span', class_='film-title-wrapper')
-            ]
+                'name': get_name(span),
+                'link': get_link(span)
+            } for span in _iter_results(source, 'span', 'film-title-wrapper')
+        )
 
     @staticmethod
-    def _get_page_lists(ul) -> list[dict]:
+    def _get_page_lists(source: requests.Response | lxml.html.HtmlElement) -> Iterator[dict]:
         """
         Get a page of Letterboxd search results for lists
         """
-        get_name = lambda i:i.find('h2', class_='title-2 prettify').text.strip()
-        get_link = lambda i:i.find('a').get('href')
-        get_owner_username = lambda i:i.get('data-person')
-        return [
+        get_name = lambda section:_XPATH_LIST_NAME(section)[0].text_content().strip()
+        get_link = lambda section:section.find('.//a').get('href')
+        get_owner_username = lambda section:section.get('data-person')
+        return (
             {
-                'name': get_name(i),
-                'link': get_link(i),
-                'owner-username': get_owner_username(i)
-            } for i in ul.find_all('section', class_='list')
-        ]
-
-    @property
-    def get_page_methods(self) -> dict:
-        """
-        Dictionary containing methods pertaining to extracting data
-        from a ul tag in Letterboxd search results
-        """
-        return {
-            i.split('_')[-1]: getattr(self, i) for i in dir(self) 
-            if i != 'get_page_methods' and callable(getattr(self, i)) and '_get_page_' in i
-            }
+                'name': get_name(section),
+                'link': get_link(section),
+                'owner-username': get_owner_username(section)
+            } for section in _iter_results(source, 'section', 'list')
+        )
+
+    # Dictionary containing methods pertaining to extracting data
+    # from a page of Letterboxd search results, keyed by search category
+    # Built once, when the class is defined (NOTE: a subclass adding a category should extend it)
+    get_page_methods = {
+        'members': _get_page_members,
+        'films': _get_page_films,
+        'lists': _get_page_lists
+    }
 
     def make_substring(self, query: str, search_category: str, page_num: int = 1) -> str:
         """ 
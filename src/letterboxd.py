@@ -5,10 +5,17 @@
 
 # Local
 from exceptions import LunaboxdError
+import util
 
 # Data
 import numpy as np
 import inflect
+import re
+
+# Web scraping
+import lxml.html
+from lxml import etree
+import requests
 
 # Type validation
 from typing import Callable
@@ -30,6 +37,72 @@ def get_pretty_name(soup: BeautifulSoup):
     return pretty_name
 
 
+"""
+** Parsing
+"""
+
+def make_tree(response: requests.Response) -> lxml.html.HtmlElement:
+    """ 
+    Parses the HTML of a response into an lxml tree
+
+    The raw bytes are passed to lxml, which decodes them itself (in C)
+    The encoding given by the response headers is used, 
+        since the page fragments Letterboxd serves (e.g. /csi/ pages) don't declare a charset
+    """
+    if not response.content.strip():
+        # lxml cannot parse an empty document
+        return lxml.html.fromstring('<html></html>')
+    parser = lxml.html.HTMLParser(encoding = response.encoding or 'utf-8')
+    return lxml.html.fromstring(response.content, parser=parser)
+
+
+def iter_elements(source: requests.Response | lxml.html.HtmlElement, tag: str, chunk_size: int = 16384):
+    """ 
+    Yields each :tag: element of a page, once the element (and all it contains) has been parsed
+
+    > Parameters <
+    --------------
+    :source:
+        either a response, whose HTML is stream-parsed,
+        or a tree which has already been parsed (e.g. by make_tree), which is simply iterated over
+
+    NOTE: when stream-parsing, 
+        - the document is only parsed as far as it is read, so the caller can stop once it has found what it is after
+          without the rest of it being parsed
+        - each element's contents are cleared once the caller has moved on from it
+          unless it is inside another :tag: element, which is yet to be yielded (so must be left whole)
+          (but the rest of the tree parsed so far is still kept, so memory use still grows with the document)
+    """
+    if isinstance(source, lxml.html.HtmlElement):
+        yield from source.iter(tag)
+        return
+
+    parser = etree.HTMLPullParser(events=('start', 'end'), tag=tag, encoding = source.encoding or 'utf-8')
+    # So elements have the same methods as those from make_tree (e.g. text_content)
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+    content = source.content
+    # How many :tag: elements are open (i.e. the element whose end was just parsed is inside this many others)
+    num_open = 0
+    for i in range(0, len(content), chunk_size):
+        parser.feed(content[i:i+chunk_size])
+        for event, element in parser.read_events():
+            if event == 'start':
+                num_open += 1
+                continue
+            num_open -= 1
+            yield element
+            if not num_open:
+                element.clear(keep_tail=True)
+
+
+def has_class(class_name: str) -> str:
+    """ 
+    Returns an XPath predicate that matches elements which have :class_name: as one of their classes
+    (i.e. the equivalent of BeautifulSoup's class_=class_name)
+    """
+    return f'contains(concat(" ", normalize-space(@class), " "), " {class_name} ")'
+
+
 """
 ** Numbers
 """
@@ -49,24 +122,27 @@ def shortnum_to_int(text: str) -> int:
     if 'M' in string: pre_final *= 1000000
     return int(pre_final)
 
+# Divisor and suffix for each shorthand, largest first
+SHORTNUM_TIERS = ((1_000_000_000, 'b'), (1_000_000, 'm'), (1_000, 'k'))
+
 def int_to_shortnum(num: int | float) -> str:
     """
     Convert an int to a short representation of a number based on Letterboxd style
     """
-    if num >= (billion := 1_000_000_000):
-        value = num / billion
-        return f"{num / 1_000_000_000:.1f}b" if value < 10 else f"{num / 1_000_000_000:.0f}b"
-    elif num >= (million := 1_000_000):
-        value = num / million
-        return f"{num / 1_000_000:.1f}m" if value < 10 else f"{num / 1_000_000:.0f}m"
-    elif num >= (thousand := 1_000):
-        value = num / thousand
-        return f"{num / 1_000:.1f}k" if value < 10 else f"{num / 1_000:.0f}k"
-    else:
-        return str(num)
+    for divisor, suffix in SHORTNUM_TIERS:
+        if num >= divisor:
+            value = num / divisor
+            return f"{value:.1f}{suffix}" if value < 10 else f"{value:.0f}{suffix}"
+    return str(num)
+
+# Singular and plural of the nouns Letterboxd uses (e.g. in suburls), so these don't go through inflect
+_NOUNS = (('film', 'films'), ('list', 'lists'), ('review', 'reviews'), ('diary', 'diaries'), ('tag', 'tags'), ('follower', 'followers'), ('member', 'members'))
+NOUN_SWITCHES = {a: b for pair in _NOUNS for a, b in (pair, pair[::-1])}
 
 def noun_switch(noun: str):
     """ Convert a noun to its singular if plural else to its plural if singular """
+    if (switched := NOUN_SWITCHES.get(noun)):
+        return switched
     if (converted_to_singular := inflect_engine.singular_noun(noun)):
         return converted_to_singular
     elif (converted_to_plural := inflect_engine.plural_noun(noun)):
@@ -84,29 +160,44 @@ RATINGS_RANGE = np.arange(0.5, 5.5, 0.5) # Range of valid Letterboxd ratings
 RATING_MIDDLE = np.mean(RATINGS_RANGE) # Mean of valid Letterboxd ratings
 
 
+# Every valid rating and its star rating (e.g. 3.5: '★★★½')
+# For whatever reason, Letterboxd uses RATING_HALF_ONLY for a single half star, rather than a ½
+NUM_TO_STAR_RATING = {
+    float(num): RATING_HALF_ONLY if num == 0.5 else f"{RATING_STAR*int(num)}{RATING_HALF*int(num*2 % 2)}"
+    for num in RATINGS_RANGE
+}
+STAR_RATING_TO_NUM = {v: k for k, v in NUM_TO_STAR_RATING.items()}
+# Though in places (e.g. the -micro rating spans of friends' ratings) a lone ½ is used after all
+STAR_RATING_TO_NUM[RATING_HALF] = 0.5
+
+# Title of a link in a rating histogram (of a film, or a member's profile)
+# Captures the number of ratings and the star rating (e.g. '2,000 ★★½ ratings (1%)' -> ('2,000', '★★½'))
+PATTERN_RATING_TITLE = re.compile(fr"^([\d,]+)\s+({RATING_HALF_ONLY}|[{RATING_STAR}{RATING_HALF}]+) rating")
+
+
 def num_to_star_rating(num:float) -> str:
     """
-    Convert a string star rating to a float
+    Convert a float to a string star rating
     For example: 3.5 -> ★★★½
     """
-    # For whatever reason, Letterboxd uses this format for a single half star, rather than a ½
-    if num == 0.5: return RATING_HALF_ONLY
-
-    num_int = int(num*2)
-    if num_int not in range(1,11): raise ValueError(f"Invalid num: {num}. Must be in inclusive range: (0.5, 5.0)")
-
-    star, half = divmod(num_int, 2)
-    return f"{RATING_STAR*star}{RATING_HALF*half}"
+    try:
+        return NUM_TO_STAR_RATING[num]
+    except KeyError:
+        raise ValueError(f"Invalid num: {num}. Must be in inclusive range: (0.5, 5.0)") from None
 
 
 def star_rating_to_num(star_rating:str) -> float:
     """
-    Convert a float to a string star rating
+    Convert a string star rating to a float
     For example: ★★★½ -> 3.5
     """
-    if star_rating == RATING_HALF_ONLY: return 0.5
-
     star_rating = star_rating.strip()
+    try:
+        return STAR_RATING_TO_NUM[star_rating]
+    except KeyError:
+        pass
+
+    # Not in its usual form (e.g. '½★'), so count the stars and half stars instead
     if any(invalid_chars := [c for c in star_rating if c not in (RATING_STAR, RATING_HALF)]):
         raise ValueError(f"Invalid chars: {invalid_chars}")
     result = float(star_rating.count(RATING_STAR) + (0.5 * star_rating.count(RATING_HALF)))
@@ -115,8 +206,9 @@ def star_rating_to_num(star_rating:str) -> float:
     return result
 
 
-# Removing unwanted characters
-remove_special_chars = lambda string, allowed=[]: ''.join(c for c in string if c.isalpha() or c.isdigit() or c.isspace() or c in allowed)
+def remove_special_chars(string: str, allowed=[]) -> str:
+    """ Removes unwanted characters - i.e. any that aren't letters, digits, whitespace, or in :allowed: """
+    return util.remove_special_chars(string, allowed)
 
 """
 ** Strings
@@ -156,8 +248,25 @@ dp_two = lambda x: f"{x:.2f}" if isinstance(x, int|float) else x
 ** Page navigation
 """
 
-def get_last_page(soup) -> int:
-    """ For Letterboxd pages with numbered page navigation, returns the last page """
+_XPATH_LAST_PAGE = etree.XPath(f'//div[{has_class("pagination")}]//li[{has_class("paginate-page")}][last()]/a')
+
+# The number of each page in the page navigation, matched against the raw bytes of a page
+# (e.g. <li class="paginate-page"><a href="/.../page/5/">5</a></li>, or <span> for the current page)
+_PATTERN_PAGINATE_PAGE = re.compile(rb'class="paginate-page[^"]*"[^>]*>\s*<(?:a|span)\b[^>]*>\s*([\d,]+)\s*<')
+
+def get_last_page(soup: requests.Response | BeautifulSoup | lxml.html.HtmlElement) -> int:
+    """ 
+    For Letterboxd pages with numbered page navigation, returns the last page 
+
+    If a response is passed, its raw bytes are searched, so that it needn't be parsed first
+    """
+    if isinstance(soup, requests.Response):
+        return max((int(num.replace(b',', b'')) for num in _PATTERN_PAGINATE_PAGE.findall(soup.content)), default=1)
+
+    if isinstance(soup, lxml.html.HtmlElement):
+        last_page = _XPATH_LAST_PAGE(soup)
+        return int(last_page[0].text_content()) if last_page else 1
+
     pagination = soup.find('div', class_='pagination')
     if not pagination:
         return 1
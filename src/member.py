@@ -9,8 +9,25 @@ import letterboxd
 from session import LunaboxdSession
 import util
 
+# Data
+import datetime
+
+# Math
+import numpy as np
+
 # Webscraping
-from bs4 import BeautifulSoup
+from lxml import etree
+import requests
+
+# Concurrency
+from concurrent.futures import ThreadPoolExecutor
+
+# Caching
+from functools import cached_property
+
+# Collections
+from itertools import chain
+from typing import Iterator, Self
 
 
 # --- Rich --- START
@@ -23,22 +40,47 @@ console = Console(theme = util.style_theme)
 # --- Rich --- END
 
 
+# --- XPaths --- START
+
+_has_class = letterboxd.has_class
+
+# The profile link of each person on a page of followers / following
+_XPATH_PEOPLE_HREFS = etree.XPath(f'//td[{_has_class("table-person")}]/descendant::a[1]/@href')
+_XPATH_NEXT_PAGE = etree.XPath(f'//a[{_has_class("next")}]')
+
+# Parts of the profile page
+_XPATH_DISPLAY_NAME = etree.XPath(f'//h1[{_has_class("title-1")}]')
+_XPATH_BADGE = etree.XPath(f'//span[{_has_class("badge")}]')
+_XPATH_PROFILE_STATISTICS = etree.XPath(f'//h4[{_has_class("profile-statistic")}]')
+_XPATH_STATISTIC_DEFINITION = etree.XPath(f'.//span[{_has_class("definition")}]')
+_XPATH_STATISTIC_VALUE = etree.XPath(f'.//span[{_has_class("value")}]')
+_XPATH_FAVOURITES = etree.XPath('//section[@id="favourites"]//div[@data-film-id]')
+_XPATH_RATING_HISTOGRAM_TITLES = etree.XPath(f'//div[{_has_class("rating-histogram-exploded")}]/descendant::ul[1]//@title')
+
+# --- XPaths --- END
+
+
 @util.custom_repr
 class UserInfo:
 
+    # How many pages of followers / following are requested at once
+    PEOPLE_PAGES_PER_BATCH = 8
+
+    # How long a member's profile and followers / following pages are cached on disk for
+    # After that they are revalidated, rather than downloaded again if unchanged
+    cache_expiry = datetime.timedelta(hours=1)
+
     def __init__(self, username: str) -> None:
         self.session = LunaboxdSession.load()
+        self.username = username
 
         # Check that username is valid
         try:
-            # The user's profile was not found - assume they do not exist
-            self.session.request('GET', f"{username}/")
+            self._get_profile_soup()
         except PageNotFound:
+            # The user's profile was not found - assume they do not exist
             raise ValueError(f"Invalid username: {username}")
 
-        self.username = username
-        self._get_profile_soup()
-
     def __str__(self):
         name_str = f"{self.username} ({self.display_name})"
         if self.badge: name_str += f" [{self.badge}]"
@@ -79,24 +121,48 @@ class UserInfo:
 
     @classmethod
     def from_display_name(cls, display_name: str):
-        person = Find().search(display_name, 'members', limit=1)
+        person = Find()(display_name, 'members', limit=1)
 
         if not person:
             raise LunaboxdError(f"Could not find username based on :display_name: given")
         return cls( person[0]['username'] )
 
+    @classmethod
+    def from_display_names(cls, display_names: list[str], max_workers: int = 8) -> list[Self]:
+        """
+        Returns a UserInfo for each display name
+        Each needs a search and its profile requesting, so these are done concurrently
+            and a name that appears more than once is only looked up once
+
+        > Returns <
+        -----------
+        The UserInfos, in the same order as :display_names:
+        """
+        unique_names = list(dict.fromkeys(display_names))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            users = dict(zip(unique_names, executor.map(cls.from_display_name, unique_names)))
+        return [users[name] for name in display_names]
+
     """
     ** Soup getters
     """
 
-    def _get_profile_soup(self) -> None:
+    def _get_profile_soup(self, response: requests.Response | None = None) -> None:
         """ 
-        Get the BeautifulSoup for the user's profile page
+        Get the lxml tree for the user's profile page
         Update the :self.soup_profile: variable accordingly
+
+        > Parameters <
+        --------------
+        :response:
+            the response for the profile page, if it has already been requested
         """
-        response = self.session.request('GET', f"{self.username}/")
-        profile_soup = BeautifulSoup(response.text, 'lxml')
-        self.soup_profile = profile_soup
+        # Attributes scraped from the previous soup are now out of date
+        util.clear_cached_properties(self)
+
+        if response is None:
+            response = self.session.request('GET', f"{self.username}/", expire_after=self.cache_expiry)
+        self.soup_profile = letterboxd.make_tree(response)
 
     """
     ** Actions
@@ -138,7 +204,7 @@ class UserInfo:
     ** Attributes
     """
 
-    @property
+    @cached_property
     def display_name(self) -> str:
         """
         Makes a request to the user's profile and gets the display name
@@ -153,26 +219,25 @@ class UserInfo:
         -----------
         display_name (str)
         """
-        return self.soup_profile.find('h1', class_='title-1').text
+        return _XPATH_DISPLAY_NAME(self.soup_profile)[0].text_content()
 
-    @property
+    @cached_property
     def badge(self) -> str | None:
         """
         Letterboxd users have a badge that represents their membership level
         (free = None | pro = pro | patron = patron)
         """
-        badge = self.soup_profile.find('span', class_='badge')
-        return None if not badge else badge.text
+        badge = _XPATH_BADGE(self.soup_profile)
+        return None if not badge else badge[0].text_content()
 
-    @property
+    @cached_property
     def profile_statistics(self):
         """ Films | This Year | Lists | Following | Followers """
-        profile_statistics = self.soup_profile.find_all('h4', class_='profile-statistic')
-        return {
-            util.remove_special_chars(i.find('span', class_='definition').text.lower()): letterboxd.shortnum_to_int(i.find('span', class_='value').text) for i in profile_statistics
-            }
+        get_definition = lambda i:util.remove_special_chars(_XPATH_STATISTIC_DEFINITION(i)[0].text_content().lower())
+        get_value = lambda i:letterboxd.shortnum_to_int(_XPATH_STATISTIC_VALUE(i)[0].text_content())
+        return {get_definition(i): get_value(i) for i in _XPATH_PROFILE_STATISTICS(self.soup_profile)}
 
-    @property
+    @cached_property
     def favourites(self) -> list[tuple]:
         """
         Gets the user's favourite films
@@ -182,75 +247,110 @@ class UserInfo:
         [(fav1_id, fav1_name), (fav2_id, fav2_name), ...]
         """
 
-        divs = self.soup_profile.find('section', id='favourites').find_all('div', attrs={'data-film-id': True})
         return [
             (
                 int(i.get('data-film-id')), # film_id
-                i.find('img').get('alt') # film name
+                i.find('.//img').get('alt') # film name
                 
-            ) for i in divs
+            ) for i in _XPATH_FAVOURITES(self.soup_profile)
         ]
 
     """
     ** Network
     """
 
-    @property
+    @cached_property
     def following(self) -> list:
         """ Returns a list of users (usernames) the user is following """
         return self._get_people('following')
 
-    @property
+    @cached_property
     def followers(self) -> list:
         """ Returns a list of users (usernames) the user is followed by """
         return self._get_people('followers')
 
-    @property
+    @cached_property
     def followers_you_know(self) -> list:
         return self._get_people('followers-you-know')
             
-    @property
+    @cached_property
     def mutuals(self) -> list:
         """
         Returns a list of mutuals
         """
-        following = set(self.following)
-        followers = set(self.followers)
-        return list(following.intersection(followers))
+        # The smaller of the two lists is got in full
+        # (the number of each is on the user's profile, so this takes no extra requests)
+        statistics = self.profile_statistics
+        smaller, larger = sorted(('following', 'followers'), key=lambda i: statistics.get(i, 0))
+        if larger in self.__dict__:
+            # Both lists have already been got
+            return list(set(getattr(self, smaller)).intersection(getattr(self, larger)))
+
+        # The larger list is only paged through until every person in the smaller one has been found
+        pending = set(getattr(self, smaller))
+        mutuals = list()
+        for people in self._iter_people(larger):
+            if not pending:
+                break
+            for person in people:
+                if person in pending:
+                    mutuals.append(person)
+                    pending.discard(person)
+        return mutuals
         
     def _get_people(self, suburl: str) -> list:
         """ 
-        Scrapes the profile links (original usernames) on a page
+        Scrapes the profile links (original usernames) on all pages
             of a given user's followers/following page
 
         > Parameters <
         --------------
-        :soup:
-            the soup of the page for a user's following / followers
+        :suburl:
+            the page of people (e.g. 'followers')
         
         > Returns <
         -----------
         :people: 
         """           
-        results = list()
+        return list(chain.from_iterable(self._iter_people(suburl)))
+
+    def _iter_people(self, suburl: str) -> Iterator[list]:
+        """ 
+        Yields the profile links (original usernames) on each page
+            of a given user's followers/following page, in order
+        So the caller can stop without the rest of the pages being requested
+        """
+        def get_page(page_num: int):
+            """ Returns the response for a page, or None if there is no such page """
+            try:
+                return self.session.request("GET", f"{self.username}/{suburl}/page/{page_num}", expire_after=self.cache_expiry)
+            except PageNotFound:
+                return None
+
+        # The number of pages isn't known up front, so pages are requested in concurrent batches
+        # Until a batch contains the last page
         page_num = 1
-        while True:
-            response = self.session.request("GET", f"{self.username}/{suburl}/page/{page_num}")
-            soup = BeautifulSoup(response.text, 'lxml')
-            people = [person.find('a').get('href').replace('/', '') for person in soup.find_all("td", class_="table-person")]
-            results.extend(people)
+        with ThreadPoolExecutor(max_workers=self.PEOPLE_PAGES_PER_BATCH) as executor:
+            while True:
+                batch = range(page_num, page_num + self.PEOPLE_PAGES_PER_BATCH)
+                for response in executor.map(get_page, batch):
+                    if response is None:
+                        return
 
-            if not soup.find('a', class_='next'):
-                break
-            page_num += 1
+                    tree = letterboxd.make_tree(response)
+                    people = [href.replace('/', '') for href in _XPATH_PEOPLE_HREFS(tree)]
+                    yield people
 
-        return results
+                    if not people or not _XPATH_NEXT_PAGE(tree):
+                        return
+
+                page_num += self.PEOPLE_PAGES_PER_BATCH
 
     """
     ** Ratings
     """
 
-    @property
+    @cached_property
     def rating_distribution(self) -> dict:
         """
         Scrapes the users's Letterboxd profile
@@ -264,19 +364,17 @@ class UserInfo:
         """
         # BUG: Not working
 
-        # Find histogram
-        ratings_histogram = self.soup_profile.find(
-            'div',
-            class_=['rating-histogram clear rating-histogram-exploded']
-        ).find('ul')
-
         # There are 10 li tags, 1 for each score 0.5 -> 5.0
         # Within the li tags, there's a link (provided that the user has rated >=1 film that score)
-        rating_distribution = {}
+        # So scores without a link have no ratings
+        rating_distribution = {rating_score: 0 for rating_score in letterboxd.RATINGS_RANGE}
 
-        for rating_score in letterboxd.RATINGS_RANGE:
-            tag = ratings_histogram.find(lambda tag: tag.get('title') and letterboxd.num_to_star_rating(rating_score) in tag.get('title'))
-            rating_distribution[rating_score] = int(tag.text.split()[0]) if tag and tag.text else 0
+        # Read every link's title in the histogram in a single pass (e.g. '17 ★★★½ ratings (5%)')
+        for title in _XPATH_RATING_HISTOGRAM_TITLES(self.soup_profile):
+            if not (match := letterboxd.PATTERN_RATING_TITLE.search(title)):
+                continue
+            quantity, star_rating = match.groups()
+            rating_distribution[letterboxd.star_rating_to_num(star_rating)] = int(quantity.replace(',', ''))
 
         return rating_distribution
 
@@ -286,22 +384,27 @@ class UserInfo:
         return '\n'.join([f"{k}: {v}" for k, v in symbol_dict.items()])
 
 
-    @property
+    @cached_property
+    def _rating_counts(self) -> np.ndarray:
+        """ The number of films the user has rated each score, in the order of letterboxd.RATINGS_RANGE """
+        return np.fromiter(self.rating_distribution.values(), dtype=np.int64, count=len(letterboxd.RATINGS_RANGE))
+
+    @cached_property
     def rating_total(self) -> int:
         """ Total number of films that user has rated """
-        return sum(self.rating_distribution.values())
+        return int(self._rating_counts.sum())
 
-    @property 
+    @cached_property
     def rating_average(self) -> float:
         """ The average rating score the user gives """
         ROUND_TO = 2
-        return round(sum([s*q for s,q in self.rating_distribution.items()])/self.rating_total, ROUND_TO)
+        return round(float(letterboxd.RATINGS_RANGE @ self._rating_counts) / self.rating_total, ROUND_TO)
 
     """
     ** Misc
     """
 
-    @property
+    @cached_property
     def year_projection(self) -> int:
         """ Estimates how many films the user will watch this year """
         
@@ -319,7 +422,9 @@ class Myself(UserInfo):
     def __init__(self):
         self.session = LunaboxdSession.load()
         self.username = self.session.username
-        self._get_profile_soup()
+
+        # The session may have just requested the user's profile, to check it is logged in
+        self._get_profile_soup(self.session.take_profile_response())
 
 
 
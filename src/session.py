@@ -3,20 +3,31 @@
 """
 
 # Local
+from cache import ResponseCache
 from exceptions import PageNotFound, PageForbiddenError, LetterboxdError
 import util
 
 # Data
+import atexit
 import datetime
 import json
 import os
-import pickle
 import re
+import time
 from typing import Any, Callable, Self
 
+# Concurrency
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+# Caching
+from functools import cached_property, lru_cache
+
 # Web scraping
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING as URLLIB3_ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 from urllib.parse import urlparse
 
 # Quality of life
@@ -52,6 +63,29 @@ pretty.install()
 # Rich console
 console = Console(theme = util.style_theme)
 
+# ============ Patterns ============ #
+
+# An error flagged by Letterboxd in the script tags of a response (e.g. '/errors/some_error')
+_PATTERN_ERROR = re.compile(rb"'/errors/([\w]+)'")
+
+# These are matched against the raw bytes of a response, so that it needn't be parsed
+# The start of a JSON object, and the body tag of an HTML page that has the error class
+_PATTERN_JSON_START = re.compile(rb"\s*\{")
+_PATTERN_ERROR_BODY = re.compile(rb"<body[^>]*\sclass=[\"'][^\"']*\berror\b", re.IGNORECASE)
+
+@lru_cache(maxsize=8)
+def _pattern_logged_in(username: str) -> re.Pattern:
+    """ 
+    Returns the compiled pattern for the part of a page's script that says :username: is logged in 
+    It is matched against the raw bytes of the page, so that the page needn't be parsed
+    """
+    return re.compile(rb'person\.username = "' + re.escape(username.encode()) + rb'"; person\.loggedin = true;', re.IGNORECASE)
+
+@lru_cache(maxsize=32)
+def _split_filmFilter(cookie_value: str | None) -> frozenset:
+    """ Returns the filters in the value of a filmFilter cookie (see LunaboxdSession.filmFilter) """
+    return frozenset(cookie_value.split('%20')) if cookie_value else frozenset()
+
 # ============ Credentials ============ #
 
 class Credentials:
@@ -60,6 +94,16 @@ class Credentials:
     def __init__(self) -> None:
         return self._get_credentials()
 
+    @classmethod
+    def from_username(cls, username: str) -> Self:
+        """ 
+        ** Alternative Constructor **
+        Credentials for a user who is already logged in (e.g. a saved session), so there is no password
+        """
+        credentials = cls.__new__(cls)
+        credentials.username = username
+        return credentials
+
     def __repr__(self):
         return f"{self.__class__.__name__} ({self})"
 
@@ -113,7 +157,7 @@ class LetterboxdResponseDict(dict):
             signifying that the success of the request is unknown
     """
 
-    successful_result = (True, 'success')
+    successful_result = frozenset((True, 'success'))
 
     def __init__(self, response:requests.Response) -> None:
 
@@ -157,14 +201,18 @@ class LetterboxdResponseDict(dict):
         """ Error(s) that resulted from the request according to Letterboxd """
         return self.get('error')
     
-    @property
+    @cached_property
     def ok(self) -> bool:
-        """ Returns True if the request was successful, else False """
+        """ 
+        Returns True if the request was successful, else False 
+        (Cached, since neither the response nor the dict change once the instance has been created)
+        """
         if not self.response.ok:
             return False
-        if self.result is not None and self.result not in self.successful_result:
+        result = self.get('result')
+        if result is not None and result not in self.successful_result:
             return False
-        return not self.error
+        return not self.get('error')
     
     def raise_errors(self) -> None:
         
@@ -187,34 +235,35 @@ class LetterboxdResponseDict(dict):
         self.response.raise_for_status()
 
     def get_letterboxd_response_dict(self) -> dict:
-        letterboxd_response_dict = {}
-        try:
-            letterboxd_response_dict.update(json.loads(self.response.text))
-            assert 'result' in letterboxd_response_dict
-        except:
-            pass
-
-        soup = BeautifulSoup(self.response.text, 'lxml')
-        letterboxd_response_dict['error'] = self._get_letterboxd_errors(soup)
+        letterboxd_response_dict = {'error': None}
+        content = self.response.content
+
+        # A JSON response (e.g. to a POST) is the response dict itself, so there is no HTML to look for errors in
+        if _PATTERN_JSON_START.match(content):
+            try:
+                letterboxd_response_dict.update(json.loads(content))
+                assert 'result' in letterboxd_response_dict
+            except:
+                pass
+            return letterboxd_response_dict
+
+        letterboxd_response_dict['error'] = self._get_letterboxd_errors(content)
         return letterboxd_response_dict    
 
-    def _get_letterboxd_errors(self, soup: BeautifulSoup) -> str | None:
+    def _get_letterboxd_errors(self, content: bytes) -> str | None:
         """
         Separately to the response dict, 
             sometimes there are errors flagged by Letterboxd in the script tags of the HTML response
-        This method returns a concatenated string of those errors
+        This method returns the first of those errors
+
+        The raw bytes of the response are searched, rather than the text of its parsed script tags
+        Cheapest check first - most pages (which have no errors) don't mention /errors/ at all
         """
-        # Look for errors flagged by Letterboxd in the script tags of the response
-        if not soup.find('body', class_='error'):
-            # No errors found
+        if b"/errors/" not in content or not _PATTERN_ERROR_BODY.search(content):
+            # No errors found - only a page whose body has the error class has errors flagged in its scripts
             return None
-        
-        # For whatever reason, you cannot search the soup.text
-        # You have to first find the script tags and get their text attribute
-        error_pattern = r"'/errors/([\w]+)'"
-        concatenated_text = ''.join(s.text for s in self.soup.find_all('script'))
-        error_string = util.find_one(error_pattern, concatenated_text)
-        return error_string
+        match = _PATTERN_ERROR.search(content)
+        return match.group(1).decode() if match else None
  
 
 # ============ Session ============ #
@@ -223,7 +272,7 @@ def save_session(func:Callable) -> Any:
     """
     ** Decorator **
     1. Executes the funcion
-    2. Saves the session (writes the pickle to file)
+    2. Saves the session (writes its cookies to file) - unless it was saved within the last SAVE_INTERVAL
     3. Returns result of function execution
     """
     def inner(self, *args, **kwargs):
@@ -245,6 +294,13 @@ class LunaboxdSession(requests.Session):
     # Passing the user agent makes requests less likely to be perceived as spam
     USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 Edg/91.0.864.59"
 
+    # The compressions urllib3 can decode - includes brotli (br), which compresses HTML smaller than gzip,
+    # if the brotli package is installed (pip install brotli)
+    ACCEPT_ENCODING = URLLIB3_ACCEPT_ENCODING
+
+    # The content types the session asks for - HTML pages, and JSON (e.g. the results of actions)
+    ACCEPT = 'text/html,application/json;q=0.9,*/*;q=0.5'
+
     # The homepage of the site
     URL_MAIN = "https://letterboxd.com/"
 
@@ -267,35 +323,59 @@ class LunaboxdSession(requests.Session):
     # Session cache filepath
     # So that when the program is restarted within a certain period of time,
         # the user does not need to re-enter login information
-    filename_session = f"../cache_files/{urlparse(URL_MAIN + suburl_login).netloc}_session.bat"
-
-    ## =====================================================================
-
-    # The __attrs__ class attribute
-    # is called in the requests.Session class by the __getstate__() method
-
-    # In pickle, the __dict__() method is serialised *unless* the __getstate__() method
-    # is called, in which cases the return object of the __get_state() will be pickled
-    # as the contents of the instance
-
-    # In requests.Session, the __getstate__() returns a list of 
-    # getattr(x) for x in __attrs__, which is not a real dunder method, but 
-    # just a list defined within the same requests.Session class.
-    # It contains a strings correesponding to the attribute names of the instance
-
-    # When pickleing, this method is called, so that means these items alone are pickled
-    # Hence, to pickle additional variables here, we must add them 
-    # to the __attrs__ class variable
-
-    __attrs__ = requests.Session.__attrs__
-
-    # We'd like to pickle the following variables for when the session is unpickled
-    __attrs__.extend((
-        'login_credentials',
-        'headers',
-        'cookies',
-        'Credentials'
-    ))
+    # Only the username and cookies are saved (as JSON) - never the password
+    filename_session = f"../cache_files/{urlparse(URL_MAIN + suburl_login).netloc}_session.json"
+
+    # Response cache filepath
+    # GET requests made with :expire_after: are cached here, and read from here until they expire
+    filename_response_cache = f"../cache_files/{urlparse(URL_MAIN).netloc}_responses.sqlite"
+
+    # Responses cached with :expire_after:, and how long pages that don't exist / are forbidden are cached for
+    # (so missing pages are not requested over and over, but can appear again soon after)
+    cacheable_status_codes = (200, 403, 404)
+    expire_after_error = datetime.timedelta(minutes=10)
+
+    # Connection pooling
+    # Every object that calls load() (e.g. each Film) shares the one session, 
+        # and therefore the one keep-alive connection pool to Letterboxd
+    # So the TCP + TLS handshake is paid once per connection, rather than once per request
+    POOL_CONNECTIONS = 4
+    POOL_MAXSIZE = 32
+    # raise_on_status=False hands the final response back, so errors are still raised by LetterboxdResponseDict
+    # 429 (Too Many Requests) is retried too - honouring the Retry-After header if one is sent
+    # Only idempotent methods are retried (urllib3's default) - a POST (e.g. rating a film) may already have taken effect
+    MAX_RETRIES = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+
+    # The user's credentials - set by get_credentials, or when a saved session is loaded
+    login_credentials = None
+
+    # The instance returned by load(), shared across the application
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # Held whilst the session is being saved to file
+    _save_lock = threading.Lock()
+
+    # The session is saved after a request at most this often (see save)
+    # Rather than after every request, since writing it to file is slow
+    SAVE_INTERVAL = datetime.timedelta(seconds=30)
+    # When the session was last saved (time.monotonic)
+    _last_saved = None
+
+    # Opened on first use (see the response_cache property)
+    _response_cache = None
+
+    # Called after any request that isn't a GET, since it may have changed pages already requested (see on_change)
+    _on_change_callbacks = []
+
+    # The response for the user's profile, got by the last logged_in_check
+    # So it needn't be requested again straight away (see take_profile_response)
+    _profile_response = None
+
+    # A logged_in_check that passed is trusted for this long, so it isn't requested again straight away
+    LOGGED_IN_CHECK_TTL = datetime.timedelta(seconds=60)
+    # When logged_in_check last passed (time.monotonic)
+    _logged_in_at = None
 
     ## =====================================================================
 
@@ -313,8 +393,8 @@ class LunaboxdSession(requests.Session):
         # 1. Initialise parent method
         super().__init__()
 
-        # 2. Update session headers w/ the user agent
-        self.headers.update({'user-agent': self.USER_AGENT})
+        # 2. Mount the adapter, and update session headers w/ the user agent, accepted compressions and content types
+        self._set_up()
 
         # 3. Get login credentials from the user
         self.get_credentials()
@@ -325,18 +405,23 @@ class LunaboxdSession(requests.Session):
         # 5. Login to Letterboxd
         self.login()
 
+    def _set_up(self) -> None:
+        """ Sets up the connection pool and headers - of a new session, or one loaded from file """
+        self.mount_adapter()
+        self.headers.update({'user-agent': self.USER_AGENT, 'accept-encoding': self.ACCEPT_ENCODING, 'accept': self.ACCEPT})
+
     def __repr__(self):
         return f"{self.__class__.__name__} ({self})"
 
     def __str__(self):
         return f'''
         Username: {self.username}
-        Password: {bool(self.login_credentials.password)}
+        Password: {bool(getattr(self.login_credentials, 'password', None))}
         Logged In: {self.logged_in_check()}
         '''
 
     """
-    ** Pickleing
+    ** Saving | Loading
     """
 
     @classmethod
@@ -344,49 +429,95 @@ class LunaboxdSession(requests.Session):
         """
         ** Alternative Constructor **
 
-        If an instance has been pickled to the expected location,
+        Returns the session shared across the application, 
+            loading it (see _load) the first time this is called
+        """
+        # Once loaded, the session is returned without taking the lock
+        # (e.g. each Viewing loads it, so this is called often)
+        if (instance := cls._instance) is not None:
+            return instance
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls._load()
+                # Saves made within the last SAVE_INTERVAL are skipped, so the session is saved once more on exit
+                atexit.register(cls._instance.save, force=True)
+            return cls._instance
+
+    @classmethod
+    def _load(cls) -> Self:
+        """
+        If a session has been saved to the expected location,
             1. Attempt to load it
             2. If it hasn't expired, returns it
 
         > Returns <
         -----------
-        Cached instance of the class is available, else new instance
+        Saved session if it is available, else new instance
         """
 
         file_path = cls.filename_session
         try:
-            # Open cache file in read bytes mode
-            with open(file_path, 'rb') as pf:
-                session_unpickled = pickle.load(pf)
+            with open(file_path, 'r') as f:
+                saved = json.load(f)
         except FileNotFoundError:
-            logging.info(f"Could not find saved pickle file at {file_path}. So creating new session...")
+            logging.info(f"Could not find saved session at {file_path}. So creating new session...")
             return cls() # Return new instance
-        except:
-            raise
+
+        # Restore the session from its username and cookies
+        # (__init__ is skipped, since that asks the user for their credentials and logs in)
+        session_loaded = cls.__new__(cls)
+        requests.Session.__init__(session_loaded)
+        session_loaded._set_up()
+        session_loaded.login_credentials = Credentials.from_username(saved['username'])
+        for cookie in saved['cookies']:
+            session_loaded.cookies.set_cookie(requests.cookies.create_cookie(**cookie))
         
-        # Test pickle session - is it logged in?
+        # Test saved session - is it logged in?
         one_hour_ago = datetime.datetime.now() - datetime.timedelta(hours=1)
-        if not (value := session_unpickled.logged_in_check()) or not util.file_updated_after(cls.filename_session, one_hour_ago):
-            logging.debug(f"Session unpickled logged_in_check: {value}")
+        if not (value := session_loaded.logged_in_check()) or not util.file_updated_after(cls.filename_session, one_hour_ago):
+            logging.debug(f"Saved session logged_in_check: {value}")
             # Assume session has expired
             logging.info("Session was not logged in. So creating new session...")
             return cls()
 
-        # The pickled session is valid and still logged in - so return it 
+        # The saved session is valid and still logged in - so return it 
         logging.info("Loaded session...")
-        return session_unpickled
+        return session_loaded
 
-    def save(self) -> None:
-        """ Save the Session to a bat file """
-        with open(self.filename_session, 'wb') as pf:
-            pickle.dump(self, pf)
+    def save(self, force: bool = False) -> None:
+        """ 
+        Save the Session's username and cookies to a JSON file
+
+        > Parameters <
+        --------------
+        :force:
+            if False, the session is not saved if it was saved within the last SAVE_INTERVAL
+        """
+        # Requests may be made from several threads at once - only one may write the file at a time
+        with self._save_lock:
+            now = time.monotonic()
+            if not force and self._last_saved is not None and now - self._last_saved < self.SAVE_INTERVAL.total_seconds():
+                return
+            saved = {
+                'username': getattr(self.login_credentials, 'username', None),
+                'cookies': [
+                    {
+                        'name': cookie.name, 'value': cookie.value, 
+                        'domain': cookie.domain, 'path': cookie.path, 
+                        'secure': cookie.secure, 'expires': cookie.expires
+                    } for cookie in self.cookies
+                ]
+            }
+            with open(self.filename_session, 'w') as f:
+                json.dump(saved, f)
+            self._last_saved = now
 
     @classmethod
     def delete_cache_file(cls) -> None:
         """
         > Modifies <
         ------------
-        If a pickled session is saved to the expected file path, deletes it
+        If a session is saved to the expected file path, deletes it
         """
         file_path = cls.filename_session
         if os.path.exists(file_path):
@@ -396,6 +527,19 @@ class LunaboxdSession(requests.Session):
     ** Requests
     """
 
+    def mount_adapter(self) -> None:
+        """ 
+        Mounts an HTTPAdapter with a larger connection pool and a retry policy
+        So that connections to Letterboxd are kept alive and reused between requests
+        """
+        adapter = HTTPAdapter(
+            pool_connections = self.POOL_CONNECTIONS,
+            pool_maxsize = self.POOL_MAXSIZE,
+            max_retries = self.MAX_RETRIES
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
     @property
     def csrf_token(self) -> dict:
         """
@@ -411,14 +555,54 @@ class LunaboxdSession(requests.Session):
             return data
         return self.csrf_token | data
 
+    @property
+    def response_cache(self) -> ResponseCache:
+        """ The on-disk cache of responses, shared by every instance """
+        if LunaboxdSession._response_cache is None:
+            LunaboxdSession._response_cache = ResponseCache(self.filename_response_cache)
+        return LunaboxdSession._response_cache
+
+    @classmethod
+    def on_change(cls, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        ** Decorator **
+        Registers :callback: to be called after any request that isn't a GET (e.g. rating a film)
+        So that pages cached elsewhere (e.g. a Viewing's soups) can be cleared, however the request was made
+        """
+        cls._on_change_callbacks.append(callback)
+        return callback
+
+    @property
+    def _cache_user(self) -> str:
+        """ Who responses are cached for - the logged in user's username, or '' before there is one """
+        return getattr(self.login_credentials, 'username', None) or ''
+
+    @staticmethod
+    def _get_validators(response: requests.Response) -> dict:
+        """ Returns the headers for a conditional request, from the ETag / Last-Modified headers of a response """
+        validators = {}
+        if (etag := response.headers.get('ETag')):
+            validators['If-None-Match'] = etag
+        if (last_modified := response.headers.get('Last-Modified')):
+            validators['If-Modified-Since'] = last_modified
+        return validators
+
     @save_session
-    def request(self, method: str, suburl: str = '', **kwargs) -> requests.Response():
+    def request(self, method: str, suburl: str = '', expire_after: datetime.timedelta | None = None, **kwargs) -> requests.Response():
         """
         ** Overload **
         
         Customise requests to
-            - Use URL_MAIN (Letterboxd) url prefix
+            - Use URL_MAIN (Letterboxd) url prefix (unless passed a full url)
             - Include the __CSRF token
+            - Read GET requests from the response cache, if :expire_after: is passed
+
+        > Parameters <
+        --------------
+        :expire_after:
+            if passed, the response to a GET request is cached on disk (for the logged in user) for this long
+            and until then, the cached response is returned instead of making the request
+            after that, the request is made conditionally, so an unchanged page isn't downloaded again
         """
 
         # Add the CSRF token to the data of every request (once it's available)
@@ -429,8 +613,35 @@ class LunaboxdSession(requests.Session):
         # If the URL_MAIN (i.e. main website url) is in the suburl, remove it
         suburl = suburl.replace(self.URL_MAIN, '')
 
-        # Make the request
-        response = super().request(method, url=f"{self.URL_MAIN}{suburl}", **kwargs)
+        # A full url of another site (e.g. a boxd.it short link) is requested as it is
+        url = suburl if suburl.startswith(('http://', 'https://')) else f"{self.URL_MAIN}{suburl}"
+        is_get = method.upper() == 'GET'
+        use_cache = expire_after is not None and is_get
+        cached_response, fresh = self.response_cache.lookup(url, self._cache_user) if use_cache else (None, False)
+
+        if fresh:
+            response = cached_response
+            logging.debug(f"Loaded response from cache: {url}")
+        else:
+            # An expired response is revalidated - if the page hasn't changed, the server responds 304 without a body
+            if cached_response is not None and (validators := self._get_validators(cached_response)):
+                kwargs['headers'] = validators | (kwargs.get('headers') or {})
+
+            # Make the request
+            response = super().request(method, url=url, **kwargs)
+
+            # Anything but a GET (e.g. rating a film) may change pages that have been cached for the user
+            if not is_get:
+                self.response_cache.clear(self._cache_user)
+                for callback in self._on_change_callbacks:
+                    callback()
+
+            if cached_response is not None and response.status_code == 304:
+                logging.debug(f"Revalidated cached response: {url}")
+                response = cached_response
+
+            if use_cache and response.status_code in self.cacheable_status_codes:
+                self.response_cache.set(url, self._cache_user, response, expire_after if response.ok else self.expire_after_error)
 
         # Add Letterboxd's feedback about the request to the Response object 
         # This will also raise any errors flagged by Letterboxd
@@ -439,6 +650,25 @@ class LunaboxdSession(requests.Session):
         # Return the Response object
         return response
 
+    def request_many(self, method: str, suburls: list[str], max_workers: int = 8, **kwargs) -> list[requests.Response]:
+        """
+        Makes the same kind of request to each suburl concurrently
+        For independent requests (e.g. the pages of a search), so they take about one round trip rather than one each
+
+        > Parameters <
+        --------------
+        :max_workers:
+            how many requests are made at once
+        :kwargs:
+            passed to request() for every suburl
+
+        > Returns <
+        -----------
+        The responses, in the same order as :suburls:
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda suburl: self.request(method, suburl, **kwargs), suburls))
+
     """
     ** Credentials | Logging in | Logging out
     """
@@ -466,6 +696,8 @@ class LunaboxdSession(requests.Session):
         
         # Make login request
         response = self.request('POST', self.suburl_login, data=credentials)
+        # Save the logged in session straight away
+        self.save(force=True)
 
         # Confirmation message
         console.print(f"\nSuccessfully logged in as {self.username}!", style='success')
@@ -480,6 +712,8 @@ class LunaboxdSession(requests.Session):
 
         # Logout
         response = self.request('GET', self.suburl_logout)
+        self._logged_in_at = None
+        self.save(force=True)
         self._raise_lb_response_dict(response)
 
     def logged_in_check(self) -> bool:
@@ -493,7 +727,13 @@ class LunaboxdSession(requests.Session):
         > Returns <
         -----------
         self.logged_in
+
+        NOTE: if the check passed within the last LOGGED_IN_CHECK_TTL, it is not made again
         """
+        if self._logged_in_at is not None and time.monotonic() - self._logged_in_at < self.LOGGED_IN_CHECK_TTL.total_seconds():
+            return True
+        self._logged_in_at = None
+
         ## Get user's profile soup
         try:
             response = self.request('GET', f"{self.username}/")
@@ -507,15 +747,23 @@ class LunaboxdSession(requests.Session):
         # except LBResponseDictError:
         #     raise
         else:
-            soup = BeautifulSoup(response.text, 'lxml')
+            self._profile_response = response
 
             # Part of the script that says if user is logged_in
             # Finding it == user IS logged_in
-            pattern = rf"person.username = \"{self.username.lower()}\"; person.loggedin = true;"
-            script_text = ''.join([i.text for i in soup.find_all('script')]).lower()      
-            match = re.search(pattern, script_text)
-            return bool(match)
+            if not _pattern_logged_in(self.username.lower()).search(response.content):
+                return False
+            self._logged_in_at = time.monotonic()
+            return True
         
+    def take_profile_response(self) -> requests.Response | None:
+        """ 
+        Returns the response for the user's profile got by logged_in_check, if there is one
+        It is only handed out once, so that it isn't reused once it could be out of date
+        """
+        response, self._profile_response = self._profile_response, None
+        return response
+
     """
     ** Attributes
     """
@@ -534,14 +782,20 @@ class LunaboxdSession(requests.Session):
 
         The filmFilters take the form of a list (you can apply more than one filter at once)
         """
-        filmFilters = self.cookies.get(self.cookie_name_filmFilter, None)
-        return set() if not filmFilters else set(filmFilters.split('%20'))
+        # A copy, since the cached split is shared (and so is immutable)
+        return set(_split_filmFilter(self.cookies.get(self.cookie_name_filmFilter, None)))
 
     @filmFilter.setter
     def filmFilter(self, filters: set) -> None:
-        """ Setter for the filmFilter cookie """
+        """ 
+        Setter for the filmFilter cookie 
+        The filters are sorted, so the same filters always give the same cookie - which is only set if it has changed
+        """
+        value = '%20'.join(sorted(filters))
+        if value == self.cookies.get(self.cookie_name_filmFilter, None):
+            return
         logging.debug(f"Setting filmFilter to {filters}")
-        self.cookies.set(self.cookie_name_filmFilter, '%20'.join(filters))
+        self.cookies.set(self.cookie_name_filmFilter, value)
 
     def filmFilter_reset(self) -> None:
         """ Resetter for the filmFilter cookie """
@@ -9,11 +9,17 @@ import util
 from viewing import Viewing, MyViewing
 
 # Web scraping
-from bs4 import BeautifulSoup, Tag
+from lxml import etree
 
 # Data
 import re
 
+# Concurrency
+from concurrent.futures import ThreadPoolExecutor
+
+# Caching
+from functools import lru_cache
+
 # Debugging
 import logging
 
@@ -26,9 +32,37 @@ console = Console()
 
 # --- Rich --- END
 
+
+# --- Patterns --- START
+
+_PATTERN_NO_TAGS = re.compile(r"^No [a-zA-Z]+ tags yet$")
+
+# --- Patterns --- END
+
+
+# --- XPaths --- START
+
+_has_class = letterboxd.has_class
+
+_XPATH_TAG_LIS = etree.XPath(f'(//ul[{_has_class("tags")}])[1]//li')
+# Within an li tag: the link to the tag (which has the tag's name as its title), and the number of times it's been used
+_XPATH_TAG_LINK = etree.XPath('descendant::a[@title][1]')
+_XPATH_TAG_TIMES_USED = etree.XPath('descendant::span[1]')
+
+@lru_cache(maxsize=None)
+def _xpath_viewing_links(html_class: str) -> etree.XPath:
+    """ Returns the XPath for the href of the first link in each element with the class(es) :html_class: """
+    predicate = ' and '.join(_has_class(name) for name in html_class.split())
+    return etree.XPath(f'//*[{predicate}]/descendant::a[1]/@href')
+
+# --- XPaths --- END
+
 @util.custom_repr
 class Tags:
 
+    # The class of the Viewings returned by get_viewings
+    viewing_class = Viewing
+
     def __init__(self, username: str):
         self.session = LunaboxdSession.load()
         self.username = username
@@ -58,45 +92,39 @@ class Tags:
         """
         category = self._get_valid_category(category)
 
-        def get_soup(page_num: int) -> BeautifulSoup:
-            """ Given a page number, get the soup of the tags page """
-            response = self.session.request('GET', f'{self.username}/tags/{category}/page/{page_num}')
-            return BeautifulSoup(response.text, 'lxml')  
-
-        def get_tag_name(li: Tag) -> str:
-            """ Given an li_tag containing tag information, get the name of the Tag """
-            return li.find('a').get('title')
-
-        def get_tag_times_used(li: Tag) -> int:
-            """ 
-            Given an li_tag containing tag information, 
-            get the number of times the user has tagged a film with this tag 
-            """
-            span_tag = li.find('span')
-            return 1 if not span_tag else int(span_tag.text)
-
         # Get the first page of the soup 
         # in order to check if there are tags and if so how many pages of tags
-        soup = get_soup(1)
+        response = self.session.request('GET', self._make_tags_suburl(category, 1))
+        soup = letterboxd.make_tree(response)
         
         # Case where there are no results (i.e. no tags)
-        no_results_header = soup.find("h2", text=re.compile(r"^No [a-zA-Z]+ tags yet$"))
-        if no_results_header:
+        if any(_PATTERN_NO_TAGS.match(h2.text or '') for h2 in soup.iter('h2')):
             return list()
 
-        # Find the last page of tags
-        last_page = letterboxd.get_last_page(soup)
+        # Find the last page of tags (from the raw bytes of the first page)
+        last_page = letterboxd.get_last_page(response)
 
         # Get tag results
-        soups = [soup] + [get_soup(i) for i in range(2, last_page)]
-        li_tags = [tag for soup in soups for tag in soup.find('ul', class_='tags').find_all('li')]
-        # Filter out unwanted li tags
-        li_tags = [i for i in li_tags if i.find('a', attrs={'title': True})]
-
-        results = {get_tag_name(li): get_tag_times_used(li) for li in li_tags}
+        # The number of pages is now known, so the rest can be requested at once
+        suburls_other = [self._make_tags_suburl(category, i) for i in range(2, last_page + 1)]
+        soups = [soup] + [letterboxd.make_tree(response) for response in self.session.request_many('GET', suburls_other)]
+
+        # For each li tag that contains a tag (i.e. a link with a title),
+        # the name of the tag and the number of times the user has tagged a film with it
+        results = {}
+        for soup in soups:
+            for li in _XPATH_TAG_LIS(soup):
+                if not (a := _XPATH_TAG_LINK(li)):
+                    continue
+                span_tag = _XPATH_TAG_TIMES_USED(li)
+                results[a[0].get('title')] = int(span_tag[0].text_content()) if span_tag else 1
 
         return results
 
+    def _make_tags_suburl(self, category: str, page_num: int) -> str:
+        """ Returns the suburl for a page of the user's tags for a given category """
+        return f'{self.username}/tags/{category}/page/{page_num}'
+
     @property
     def tags_reviews(self) -> dict:
         """ Returns a dictionary of the user's review tags and the times they occur """
@@ -132,55 +160,55 @@ class Tags:
         if type(category) != type(tag) or not isinstance(category, (list, str)):
             raise TypeError(f"Invalid types for category ({type(category)}) and tag ({type(tag)})")
         
-        def get_links(category, tag):
-            page_num = 1
-            results = list()
-            
-            # Get the class name of the HTML tag to scrape the information from
-            # This class varies depending on category
-            html_class = self.viewing_getter_html_classes[category]
-
-            while True:
-                suburl = f'{self.username}/tag/{tag}/{category}/page/{page_num}'
-                response = self.session.request('GET', suburl)
-                soup = BeautifulSoup(response.text, 'lxml')
-
-                hrefs = [i.find('a').get('href') for i in soup.find_all(class_=html_class)]
-                results.extend(hrefs)
-
-                if not soup.find('a', class_='next'):
-                    break
-                page_num += 1
-
-            return results
-
-        if isinstance(category, str) and isinstance(tag, str):
-            return get_links(tag = tag, category = category)
-        
-        elif isinstance(category, list) and isinstance(tag, list):
-            results = set()
-            [results.update(get_links(tag = t, category = c)) for c in category for t in tag] 
-            return list(results)
-
-
-    def get_viewings(self, category: str | list, tag: str | list) -> list[Viewing]:
+        # Each combination of category and tag is independent, so all their pages are requested together
+        # In two rounds (first pages, then the rest) of one request_many each, so no more than its max_workers are made at once
+        combinations = [(category, tag)] if isinstance(category, str) else [(c, t) for c in category for t in tag]
+        make_suburl = lambda category, tag, page_num: f'{self.username}/tag/{tag}/{category}/page/{page_num}'
+
+        # Get the first page of each, in order to find its last page
+        # (The last page is read from the raw bytes of the first page, so every page is parsed in the same way)
+        responses_first = self.session.request_many('GET', [make_suburl(c, t, 1) for c, t in combinations])
+
+        # The number of pages of each is then known, so the rest can be requested at once
+        pages_other = [
+            (c, make_suburl(c, t, i)) 
+            for (c, t), response in zip(combinations, responses_first) 
+            for i in range(2, letterboxd.get_last_page(response) + 1)
+        ]
+        responses_other = self.session.request_many('GET', [suburl for _, suburl in pages_other])
+
+        # The class of the HTML tag to scrape the links from varies depending on category
+        pages = [*zip((c for c, _ in combinations), responses_first), *zip((c for c, _ in pages_other), responses_other)]
+        links = [
+            link 
+            for c, response in pages 
+            for link in _xpath_viewing_links(self.viewing_getter_html_classes[c])(letterboxd.make_tree(response))
+        ]
+
+        # The links are deduplicated when there are several combinations (some viewings have several of the tags)
+        return links if isinstance(category, str) else list(set(links))
+
+
+    def get_viewings(self, category: str | list, tag: str | list, max_workers: int = 8) -> list[Viewing]:
         """
-        Returns a list of Viewings 
+        Returns a list of Viewings (of the class viewing_class)
 
         :category: and :tag: can be list or str, but must be the same type as one another
+        :max_workers: is how many Viewings are loaded at once
         """
 
         links = self._get_viewing_links(tag = tag, category = category)
 
-        results = list()
-        for link in rich.progress.track(links, description = f"Getting views for tag: {tag}, category: {category}"):
-            results.append(Viewing.from_link(link))
-
-        return results
+        # Each Viewing requests its own pages, so they are loaded concurrently (in the same order as the links)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            viewings = executor.map(self.viewing_class.from_link, links)
+            return list(rich.progress.track(viewings, total = len(links), description = f"Getting views for tag: {tag}, category: {category}"))
 
 
 class MyTags(Tags):
 
+    viewing_class = MyViewing
+
     def __init__(self):
         self.session = LunaboxdSession.load()
         self.username = self.session.username
@@ -236,20 +264,6 @@ class MyTags(Tags):
         for viewing in rich.progress.track(results, description = "\nReplacing tags"):
             viewing.replace_tags(tags_find, tags_replace)
         
-    """
-    ** Viewing getters
-    """
-
-    def get_viewings(self, category: str | list, tag: str | list) -> list:
-
-        links = self._get_viewing_links(tag = tag, category = category) 
-
-        results = list()
-        for link in rich.progress.track(links, description = f"Getting views for tag: {tag}, category: {category}"):
-            results.append(MyViewing.from_link(link))
-
-        return results
-
 
 # Testing code
 if __name__ == '__main__':
@@ -3,10 +3,15 @@
 """
 
 # Data
+import bisect
 import datetime
+import functools
+import heapq
+import html
 import os
 import re
 import unicodedata
+import numpy as np
 
 # Type validation
 from typing import Any, Callable
@@ -26,9 +31,26 @@ style_theme = Theme({
 })
 
 
-def guess_number(check_guess: Callable, max_num: int, min_num:int = 1) -> int:
+def guess_number(check_guess: Callable, max_num: int, min_num:int = 1, deterministic: bool = False) -> int:
+    """
+    Binary searches for a number between :min_num: and :max_num: (inclusive)
+
+    :check_guess:
+        given a guess, returns 'correct', 'low' (the number is higher), or 'high' (the number is lower)
+    :deterministic:
+        if True, :check_guess: is cheap and always gives the same answer for a guess (i.e. isn't asking a person)
+        so the search is left to bisect - which keeps probing past a 'correct' guess, but loops in C
+
+    > Returns <
+    -----------
+    the number, or None if there isn't one for which :check_guess: returns 'correct'
+    """
     if max_num <= min_num:
         raise ValueError(f"Invalid max_num: {max_num} and min_num: {min_num} combination")
+
+    if deterministic:
+        return _bisect_number(check_guess, max_num, min_num)
+
     low = min_num
     high = max_num
 
@@ -42,6 +64,20 @@ def guess_number(check_guess: Callable, max_num: int, min_num:int = 1) -> int:
             case 'high': high = mid - 1
 
 
+def _bisect_number(check_guess: Callable, max_num: int, min_num: int) -> int | None:
+    """ guess_number for a deterministic :check_guess: """
+    # So the final check of the result is free if it was already probed
+    check_guess = functools.lru_cache(maxsize=None)(check_guess)
+
+    # The number is the first for which the guess isn't too low
+    # A range isn't built in to a list, so bisect can search it without any allocation
+    numbers = range(min_num, max_num + 1)
+    i = bisect.bisect_left(numbers, True, key=lambda guess: check_guess(guess) != 'low')
+    if i < len(numbers) and check_guess(numbers[i]) == 'correct':
+        return numbers[i]
+    return None
+
+
 def percentage(part, total, round_to:int):
     return round((part / total) * 100, round_to)
 
@@ -83,15 +119,47 @@ def empty_str_if_none(*attr_names):
         return wrapper
     return decorator
 
+def clear_cached_properties(obj) -> None:
+    """ 
+    Removes the values stored by any functools.cached_property of an instance
+    So that they are recomputed the next time they are accessed
+    """
+    for cls in type(obj).__mro__:
+        for name, value in vars(cls).items():
+            if isinstance(value, functools.cached_property):
+                obj.__dict__.pop(name, None)
+
+def settable(cached: functools.cached_property) -> property:
+    """ 
+    Returns a property that reads a functools.cached_property (so the value is still cached)
+    A cached_property has no setter, so this allows a subclass to give it one
+        e.g. @util.settable(Viewing.rating).setter
+    """
+    return property(lambda self: cached.__get__(self, type(self)), doc=cached.__doc__)
+
 """
 ** Regex
 """
 
-def find_one(pattern: str, string: str) -> str | None:
-    """ Find only one result using regex """
-    if not (result := re.findall(pattern, string)):
+def find_one(pattern: str | re.Pattern, string: str) -> str | None:
+    """ 
+    Find only one result using regex 
+    The result is the same as the first of re.findall, but the search stops at the first match
+    """
+    pattern = _compile(pattern)
+    if not (match := pattern.search(string)):
         return None
-    return result[0]
+    # Like re.findall: the whole match, the only group, or a tuple of the groups
+    match pattern.groups:
+        case 0: return match.group(0)
+        case 1: return match.group(1) or ''
+        case _: return match.groups('')
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: str | re.Pattern) -> re.Pattern:
+    """ Returns the pattern compiled (a pattern that's already compiled is returned as is) """
+    return re.compile(pattern)
 
 """
 ** Collections
@@ -104,10 +172,20 @@ def multi_replace(text: str, find_replace: dict) -> str:
     :find_replace:
         Example ({'hello': 'welcome', 'world': 'back'})
             "hello world~" -> "welcome back~"
+
+    Every key is replaced in a single pass over :text:
+    (so a replacement is never itself replaced by a later key)
     """
-    for k, v in find_replace.items():
-        text = text.replace(k,v)
-    return text
+    if not find_replace:
+        return text
+    pattern = _pattern_multi_replace(tuple(sorted(find_replace)))
+    return pattern.sub(lambda match: find_replace[match.group(0)], text)
+
+
+@functools.lru_cache(maxsize=128)
+def _pattern_multi_replace(keys: tuple) -> re.Pattern:
+    """ Returns a compiled pattern matching any of the keys (the longest first, so that no key is shadowed by a prefix of it) """
+    return re.compile('|'.join(re.escape(key) for key in sorted(keys, key=len, reverse=True)))
 
 
 def key_max(d: dict, max_num: int = 1, multiple_maxes: bool = False) -> Any:
@@ -118,24 +196,16 @@ def key_max(d: dict, max_num: int = 1, multiple_maxes: bool = False) -> Any:
         e.g. d={'1':10, '2':20, '3': 30, '4': 40}, max_num=1 -> '4'
         e.g. d={'1':10, '2':20, '3': 30, '4': 40}, max_num=3 -> '2'
     :multiple_maxes:
-        e.g. d={'1':10, '2':20, '3': 40, '4': 40}, max_num=1 -> ('3', '4')        
+        return all max_num keys rather than only the last of them
+        e.g. d={'1':10, '2':20, '3': 40, '4': 40}, max_num=2 -> ('4', '3')
     """
-    d = d.copy()
     assert len(d) >= max_num
-    if max_num == 1: 
-        m = max(zip(d.values(), d.keys()))[1]
-    else:
-        n = 1
-        max_keys = []
-        while n <= max_num:
-            m = max(zip(d.values(), d.keys()))[1]
-            max_keys.append(m)
-            d.pop(m)
-            n += 1
+    # The keys with the largest values, largest first (ties going to the larger key)
+    max_keys = [k for k, _ in heapq.nlargest(max_num, d.items(), key=lambda item: (item[1], item[0]))]
     if multiple_maxes:
         return tuple(max_keys)
     else:
-        return m
+        return max_keys[-1]
 
 def trim_array(array:list, n:int):
     """
@@ -174,25 +244,36 @@ def preview_array(array:list, n=10) -> str:
 whole_num_to_int = lambda x: int(x) if int(x) == x else x
 
 
+@functools.singledispatch
 def _lowerfy_func(item):
-    if type(item) not in (tuple, list, set, str, dict):
-        return item
-    elif isinstance(item, str):
-        return item.lower()
-    elif isinstance(item, list):
-        return [i.lower() if isinstance(i, str) else i for i in item]
-    elif isinstance(item, tuple):
-        return (i.lower() if isinstance(i, str) else i for i in item)
-    elif isinstance(item, set):
-        return {i.lower() if isinstance(i, str) else i for i in item}
-    elif isinstance(item, dict):
-        return {k:v if isinstance(v, str) else v for k,v in item.items()}
+    """ Returns the item lowercased (or with its strings lowercased), if it's a string or a collection """
+    return item
+
+@_lowerfy_func.register
+def _(item: str):
+    return item.lower()
+
+@_lowerfy_func.register
+def _(item: list):
+    return [_lowerfy_func(i) for i in item]
+
+@_lowerfy_func.register
+def _(item: tuple):
+    return tuple(_lowerfy_func(i) for i in item)
+
+@_lowerfy_func.register
+def _(item: set):
+    return {_lowerfy_func(i) for i in item}
+
+@_lowerfy_func.register
+def _(item: dict):
+    return {k:_lowerfy_func(v) for k,v in item.items()}
 
 
 def lowerify(func: Callable):
     def wrapper(self, *args, **kwargs):
         args = (_lowerfy_func(i) for i in args)
-        kwargs = {k:_lowerfy_func(v) for k,v in kwargs}
+        kwargs = {k:_lowerfy_func(v) for k,v in kwargs.items()}
         return func(self, *args, **kwargs)
     return wrapper
 
@@ -225,24 +306,33 @@ def truncate_string(string: str, max_length: int) -> str:
     if len(string) <= max_length:
         return string
     
-    # String sliced to max_length
-    truncated_string = string[:max_length]
-
-    # Gets the index of the last space in the string
-    last_space = truncated_string.rfind(" ")
-    
-    # If the last space in the string is not at the end of the string
-    if last_space != -1:
-        
-        # Truncate string further according to where 
-        # the last space appears in the truncated string 
-        # e.g. 'hello this is my world' -> 'hello this is m -> 'hello this is'
-        truncated_string = truncated_string[:last_space]
+    # The string is cut at the last space within max_length (so its last full word)
+    # e.g. 'hello this is my world' -> 'hello this is m -> 'hello this is'
+    # Or at max_length itself, if there's no space
+    # (Searching only up to max_length means the string needn't be sliced twice)
+    if (end := string.rfind(" ", 0, max_length)) == -1:
+        end = max_length
+    truncated_string = string[:end]
     
     return f"{truncated_string}..."
 
 
-remove_special_chars = lambda string, allowed=[]: unicodedata.normalize('NFKD', ''.join(c for c in string if c.isalpha() or c.isdigit() or c.isspace() or c in allowed))
+@functools.lru_cache(maxsize=32)
+def _pattern_special_chars(allowed: str) -> re.Pattern:
+    """ Returns the compiled pattern matching any character that isn't a letter, digit, whitespace, or in :allowed: """
+    pattern = rf"[^\w\s{re.escape(allowed)}]"
+    # \w matches the underscore too
+    return re.compile(pattern if '_' in allowed else f"{pattern}|_")
+
+
+def remove_special_chars(string: str, allowed='') -> str:
+    """ 
+    Removes unwanted characters - i.e. any that aren't letters, digits, whitespace, or in :allowed: 
+    (:allowed: can be a string or a list of characters)
+    """
+    string = _pattern_special_chars(''.join(allowed)).sub('', string)
+    # An ASCII string is already normalised, so it needn't go through unicodedata
+    return string if string.isascii() else unicodedata.normalize('NFC', string)
 
 # Given a dictionary (d) create a new object with the keys and values switched
 swap_key_with_value = lambda d:{v:k for k,v in d.items()}
@@ -250,16 +340,18 @@ swap_key_with_value = lambda d:{v:k for k,v in d.items()}
 # Some Letterboxd ajax pages make use of XML character references that 
 # need to be converted before sending the data in a post request
 XML_CHAR_REFERENCES = {'&amp;': '&', '&lt;': '<', '&gt;': '>', '&quot;': '"', '&apos;': "'"}
+# For str.translate, which replaces each character in one pass
+_XML_CHARS_TABLE = str.maketrans(swap_key_with_value(XML_CHAR_REFERENCES))
 
 
 def from_xml_char_reference(string:str) -> str:
-    """ Remove all XML character references from a string """
-    return multi_replace(string, XML_CHAR_REFERENCES)
+    """ Remove all XML character references from a string (as well as any other HTML character references) """
+    return html.unescape(string)
 
 
 def to_xml_char_reference(string:str) -> str:
     """ Replace characters with their XML character reference counterparts """
-    return multi_replace(string, swap_key_with_value(XML_CHAR_REFERENCES))
+    return string.translate(_XML_CHARS_TABLE)
 
 
 """
@@ -285,14 +377,25 @@ def day_of_year() -> int:
     return datetime.datetime.now().timetuple().tm_yday
 
 
+def _symbol_lengths(nums: list, n: int) -> list[int]:
+    """ Returns each of the nums scaled so that the largest is :n: (rounded to the nearest int) """
+    nums = list(nums)
+    # Checked once, so every input behaves the same whichever way it is scaled
+    if not (max_num := max(nums)):
+        raise ZeroDivisionError("Can't scale nums whose largest is 0")
+    # Below this many, numpy's overhead outweighs its speed
+    if len(nums) < 32:
+        return [round(num / max_num * n) for num in nums]
+    array = np.fromiter(nums, dtype=np.float64, count=len(nums))
+    return np.rint(array * (n / max_num)).astype(np.int64).tolist()
+
+
 def symbol_list(nums: list, n: int, symbol:str = '|') -> list:
-    max_num = max(nums)
-    proportional_lengths = [round(num / max_num * n) for num in nums]
-    return [symbol * length for length in proportional_lengths]
+    return [symbol * length for length in _symbol_lengths(nums, n)]
 
 
 def symbol_string(nums: list, n: int, symbol: str = '|') -> None:
-    return '\n'.join(symbol_list(nums, n, symbol))
+    return '\n'.join(symbol * length for length in _symbol_lengths(nums, n))
 
 
 """
@@ -307,9 +410,11 @@ def assess_file_age(file_path: str) -> datetime.datetime:
     
 def file_updated_after(file_path: str, datetime: datetime.datetime) -> bool:
     """ Returns True if the file_path was updated after the datetime passed, else False """
-    if not os.path.exists(file_path):
+    # One stat of the file, compared in epoch seconds (rather than as a datetime)
+    try:
+        return os.stat(file_path).st_mtime > datetime.timestamp()
+    except FileNotFoundError:
         return False
-    return assess_file_age(file_path) > datetime
 
 
 class TypeCheckError(TypeError):
@@ -321,21 +426,23 @@ class TypeCheckError(TypeError):
 
 
 def type_check(expected_types: dict):
+    # Names of the expected types, for the error messages
+    get_names = lambda et: [i.__name__ for i in et] if isinstance(et, tuple) else et.__name__
+
+    # Worked out once per decorated function, rather than on every call
+    expected = tuple((i, key, expected_type, get_names(expected_type)) for i, (key, expected_type) in enumerate(expected_types.items()))
+
     def decorator(func: Callable):
         def wrapper(self, *args, **kwargs):
-            # Func for getting names of types when raising error
-            get_names = lambda et: [i.__name__ for i in et] if isinstance(et, tuple) else et.__name__
-            
-            expected_types_keys = list(expected_types.keys())
-            for i, expected_type in enumerate(expected_types.values()):
+            for i, key, expected_type, names in expected:
                 if i < len(args):
-                    if not isinstance(args[i], expected_type) and not any(isinstance(args[i], type) for type in expected_type):
-                        raise TypeCheckError(f"Positional argument {i+1} ({expected_types_keys[i]}) should be of type {get_names(expected_type)}")
-                elif expected_types_keys[i] in kwargs:
-                    if not isinstance(kwargs[expected_types_keys[i]], expected_type) and not any(isinstance(kwargs[expected_types_keys[i]], type) for type in expected_type):
-                        raise TypeCheckError(f"Keyword argument {expected_types_keys[i]} should be of type {get_names(expected_type)}")
+                    if not isinstance(args[i], expected_type):
+                        raise TypeCheckError(f"Positional argument {i+1} ({key}) should be of type {names}")
+                elif key in kwargs:
+                    if not isinstance(kwargs[key], expected_type):
+                        raise TypeCheckError(f"Keyword argument {key} should be of type {names}")
                 else:
-                    raise TypeCheckError(f"Argument {expected_types_keys[i]} is missing")
+                    raise TypeCheckError(f"Argument {key} is missing")
             return func(self, *args, **kwargs)
         return wrapper
     return decorator
@@ -8,6 +8,7 @@
 
 # Local
 from exceptions import LetterboxdError
+import letterboxd
 from session import LunaboxdSession
 import util
 
@@ -16,7 +17,14 @@ import re
 import pendulum
 
 # Web scraping 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+
+# Concurrency
+from concurrent.futures import ThreadPoolExecutor
+
+# Caching
+from functools import cached_property, lru_cache
 
 # Type validation
 from typing import Self
@@ -35,6 +43,61 @@ console = Console(theme = util.style_theme)
 # --- Rich --- END
 
 
+# --- Patterns --- START
+
+_PATTERN_SPOILERS = re.compile(r"may contain spoilers")
+
+# The HTML tags stripped from (or turned into newlines in) a review's markup
+_PATTERN_REVIEW_TAGS = re.compile(r"</?(?:p|div)>|<br\s*/?>|</br>")
+_REVIEW_TAG_REPLACEMENTS = {'</p>': '', '<p>': '\n\n', '<div>': '', '</div>': ''}
+
+# --- Patterns --- END
+
+
+# --- XPaths --- START
+
+_has_class = letterboxd.has_class
+
+_XPATH_CSI = etree.XPath(f'//div[{_has_class("js-csi")}]')
+_XPATH_FILM_POSTER = etree.XPath(f'//div[{_has_class("film-poster")}]')
+_XPATH_DATE_LINKS = etree.XPath(f'//p[{_has_class("date-links")}]')
+_XPATH_VIEW_DATE = etree.XPath(f'//p[{_has_class("view-date")}]')
+_XPATH_REVIEW = etree.XPath(f'//div[{_has_class("review")}]')
+_XPATH_RATING = etree.XPath(f'//span[{_has_class("rating-large")}]')
+_XPATH_TAGS = etree.XPath(f'//ul[{_has_class("tags")}]')
+_XPATH_ACTIVITY_SUMMARIES = etree.XPath(f'//p[{_has_class("activity-summary")}]')
+_XPATH_EDIT_REVIEW_BUTTON = etree.XPath(f'//a[{_has_class("edit-review-button")}]')
+
+# Within one of the elements above
+_XPATH_LINKS = etree.XPath('descendant::a')
+_XPATH_IMG = etree.XPath('descendant::img[1]')
+_XPATH_LAST_DIV = etree.XPath('(descendant::div)[last()]')
+
+def _first(xpath: etree.XPath, tree: lxml.html.HtmlElement) -> lxml.html.HtmlElement | None:
+    """ Returns the first element matched by the XPath (i.e. the equivalent of BeautifulSoup's find), or None """
+    return next(iter(xpath(tree)), None)
+
+# --- XPaths --- END
+
+
+@lru_cache(maxsize=512)
+def _get_soup(suburl: str) -> lxml.html.HtmlElement:
+    """ 
+    Returns the tree of a page, requesting and parsing it only the first time it is asked for
+    So loading the same Viewing again (e.g. whilst replacing its tags) doesn't request its pages again
+
+    Keyed by suburl alone, since every Viewing shares the one session (see LunaboxdSession.load)
+    NOTE: the soups must not be modified, and are cleared (see _clear_soups) after any POST, since it could change them
+    """
+    return letterboxd.make_tree(LunaboxdSession.load().request('GET', suburl))
+
+
+@LunaboxdSession.on_change
+def _clear_soups() -> None:
+    """ Clears the cached soups, since a POST (e.g. updating a Viewing) may have made them out of date """
+    _get_soup.cache_clear()
+
+
 @util.custom_repr
 class Viewing:
     """
@@ -66,7 +129,8 @@ class Viewing:
     @classmethod
     def from_link(cls, suburl: str):
         
-        split_suburl = suburl.strip('/').split('/')        
+        # username/film/film_suburl(/num)
+        split_suburl = suburl.strip('/').split('/', 3)
         num = int(split_suburl[3]) if len(split_suburl) == 4 else None
         username, _, film_suburl, *_ = split_suburl
 
@@ -101,33 +165,44 @@ class Viewing:
         # Create the table and main columns
         table = Table(show_header = True, show_lines = False)
         table.add_column('', justify = 'right', style = f'info')
-        
-
-        is_review = f"[green]review[/green]" if self.is_review else ''
-        is_diary = f"[blue]diary entry[/blue]" if self.is_diary_entry else ''
-        categories = ' & '.join((is_review, is_diary))
-
-        title = f"[purple]{self.username}[/purple]'s {categories} for [yellow]{self.film_name}[/yellow]"
-
-        table.add_column(title, style='white')
+        table.add_column(self._table_title, style='white')
 
         # Fill table rows with attributes
-        table.add_row('viewingId', f"{self.viewingId}")
-        table.add_row('filmId', f"{self.filmId}")
-        table.add_row('film name', f"{self.film_name}")
-        table.add_row('specified date', f"{self.specifiedDate}")
-        table.add_row('date', f"{self.viewingDateStr}")
-        table.add_row('rewatch', f"{self.rewatch}")
-        rating = f"{self.rating/2}" if self.rating else ''
-        table.add_row('rating', rating)
-        table.add_row('liked', f"{self.liked}")
-        table.add_row('tags', ', '.join(self.tag))
-        table.add_row('spoilers', f"{self.containsSpoilers}")
-        table.add_row('review', self.review_short())
+        for row in self._table_rows:
+            table.add_row(*row)
 
         # Print the table to screen
         console.print(table)
 
+    @cached_property
+    def _table_title(self) -> str:
+        """ The title of the table shown by display_table """
+        is_review = f"[green]review[/green]" if self.is_review else ''
+        is_diary = f"[blue]diary entry[/blue]" if self.is_diary_entry else ''
+        categories = ' & '.join(i for i in (is_review, is_diary) if i)
+
+        return f"[purple]{self.username}[/purple]'s {categories} for [yellow]{self.film_name}[/yellow]"
+
+    @cached_property
+    def _table_rows(self) -> tuple[tuple[str, str]]:
+        """ 
+        The rows of the table shown by display_table, formatted once (until the soups are updated)
+        So that displaying the same Viewing again only has to render the table
+        """
+        return (
+            ('viewingId', f"{self.viewingId}"),
+            ('filmId', f"{self.filmId}"),
+            ('film name', f"{self.film_name}"),
+            ('specified date', f"{self.specifiedDate}"),
+            ('date', f"{self.viewingDateStr}"),
+            ('rewatch', f"{self.rewatch}"),
+            ('rating', f"{self.rating/2}" if self.rating else ''),
+            ('liked', f"{self.liked}"),
+            ('tags', ', '.join(self.tag)),
+            ('spoilers', f"{self.containsSpoilers}"),
+            ('review', self.review_short())
+        )
+
     def __eq__(self, other):
         """ 
         Returns True if the ViewingId is equivalent to the object it is being compared to
@@ -186,6 +261,12 @@ class Viewing:
     @property
     def data(self) -> dict:
         """ Dictionary of data used for making post requests to update review information """
+        # A copy, so that changes made to it (e.g. by update) don't alter the cached data
+        return self._data.copy()
+
+    @cached_property
+    def _data(self) -> dict:
+        """ The data, built once from the scraped attributes (until the soups are updated) """
         return {
             'viewingId': self.viewingId,
             'filmId': self.filmId,
@@ -200,111 +281,143 @@ class Viewing:
         }
 
     def update_soups(self) -> None:
-        """ Update the soups so that data reflects the up to date viewing """
-        make_soup = lambda suburl: BeautifulSoup(self.session.request('GET', suburl).text, 'lxml')
+        """ 
+        Update the soups so that data reflects the up to date viewing 
+        (Pages already requested are reused, until a POST clears them - see _get_soup)
+        """
+        # Attributes scraped from the previous soups may now be out of date
+        util.clear_cached_properties(self)
 
         self.soups = dict()
-        self.soups['viewing_page'] = make_soup(self.suburl_and_num)
-        self.soups['liked_src'] = make_soup(f"{self.suburl}activity/")
+
+        # The pages are independent, so the activity page is requested whilst the viewing page is
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            liked_src = executor.submit(_get_soup, f"{self.suburl}activity/")
+            self.soups['viewing_page'] = _get_soup(self.suburl_and_num)
+            self.soups['liked_src'] = liked_src.result()
 
         logging.debug(f"Updated soups for viewing:{self.viewingId}")
 
+    """
+    ** Elements of the viewing page
+        - several attributes are read from each, so each is found once
+    """
+
+    @cached_property
+    def _film_poster(self):
+        return _first(_XPATH_FILM_POSTER, self.soups['viewing_page'])
+
+    @cached_property
+    def _date_links(self):
+        return _first(_XPATH_DATE_LINKS, self.soups['viewing_page'])
+
+    @cached_property
+    def _view_date(self):
+        return _first(_XPATH_VIEW_DATE, self.soups['viewing_page'])
+
+    @cached_property
+    def _review_div(self):
+        return _first(_XPATH_REVIEW, self.soups['viewing_page'])
+
     """
     ** Attributes
+        - cached, since each is scraped from the soups (cleared by update_soups)
     """
 
-    @property
+    @cached_property
     def viewingId(self) -> int:
         """ Returns the Viewing's id """
-        return int(self.soups['viewing_page'].find_all('div', class_='js-csi')[1].get('data-src').split('/')[3])
+        return int(_XPATH_CSI(self.soups['viewing_page'])[1].get('data-src').split('/')[3])
 
-    @property
+    @cached_property
     def filmId(self) -> int:
         """ Returns the filmId """
-        return int(self.soups['viewing_page'].find('div', class_='film-poster').get('data-film-id'))
+        return int(self._film_poster.get('data-film-id'))
 
-    @property
+    @cached_property
     def film_name(self) -> str:
         """ Returns the film name as a string """
-        return self.soups['viewing_page'].find('div', class_='film-poster').find('img').get('alt')
+        return _XPATH_IMG(self._film_poster)[0].get('alt')
 
-    @property
+    @cached_property
     def specifiedDate(self) -> bool:
         """
         Returns True if the review has a specified date else False
         """
-        return bool(self.soups['viewing_page'].find('p', class_='date-links').find('a'))
+        return bool(_XPATH_LINKS(self._date_links))
 
-    @property
+    @cached_property
     def viewingDateStr(self) -> str:
         """
         Returns a string representation of the date the review author watched the film
         """
         if self.specifiedDate:
-            viewingDateStr = '-'.join(self.soups['viewing_page'].find('p', class_='view-date').find_all('a')[1].get('href').split('/')[-4:-1])
+            viewingDateStr = '-'.join(_XPATH_LINKS(self._view_date)[1].get('href').split('/')[-4:-1])
         else:
-            string = self.soups['viewing_page'].find('p', class_='date-links').text.strip()
+            string = self._date_links.text_content().strip()
             p_format = "DD MMM YYYY"
             viewingDateStr = pendulum.from_format(string, p_format).to_date_string()
         return viewingDateStr
 
-    @property
+    @cached_property
     def review(self) -> str:
         """ Returns the content of the review """
-        review = self.soups['viewing_page'].find('div', class_='review').find_all('div')[-1]
-        review = util.multi_replace(
-            str(review),
-            {'</p>': '', '<p>': '\n\n', '</br>': '\n', '<div>': '', '</div>': ''}
+        review = _XPATH_LAST_DIV(self._review_div)[0]
+        # Any tag not in the replacements is a line break
+        review = _PATTERN_REVIEW_TAGS.sub(
+            lambda match: _REVIEW_TAG_REPLACEMENTS.get(match.group(0), '\n'),
+            lxml.html.tostring(review, encoding='unicode', with_tail=False)
         )
-        return review.lstrip('\n\n')
+        return review.lstrip('\n')
 
     def review_short(self, max_chars = 250) -> str:
         """ Return a shorter version of the review if the review length exceeds :max_chars: """
         return util.truncate_string(self.review, max_chars)
 
-    @property
+    @cached_property
     def rating(self) -> int:
         """ 
         Returns the rating score the review author gave the film 
         If they didn't give it a rating, returns 0
         """
-        if (rating_span := self.soups['viewing_page'].find('span', class_='rating-large')):
-            return int(rating_span.get('class')[-1].split('-')[-1])
+        if (rating_span := _first(_XPATH_RATING, self.soups['viewing_page'])) is not None:
+            return int(rating_span.get('class').split()[-1].split('-')[-1])
         # If no rating given, Letterboxd uses the value 0
         return 0
 
-    @property
+    @cached_property
     def liked(self) -> bool:
         """ 
         Returns True if the review author 'liked' the film, else False 
         """
-        activity_summaries = [re.sub(' +', ' ', i.text) for i in self.soups['liked_src'].find_all('p', class_='activity-summary')]
-        pattern = rf"liked(?: and rated)? {self.film_name}"
-        return any((re.findall(pattern, i) for i in activity_summaries))
+        # (With any runs of whitespace collapsed to a single space)
+        activity_summaries = (' '.join(p.text_content().split()) for p in _XPATH_ACTIVITY_SUMMARIES(self.soups['liked_src']))
+        liked, liked_and_rated = f"liked {self.film_name}", f"liked and rated {self.film_name}"
+        return any(liked in i or liked_and_rated in i for i in activity_summaries)
         
-    @property
+    @cached_property
     def containsSpoilers(self) -> bool:
         """
         Returns True if the review has been labelled as containing spoilers, else False 
         """
-        return True if (self.review and self.soups['viewing_page'].find('div', class_='review').find('em', text=re.compile(r"may contain spoilers"))) else False           
+        return bool(self.review) and any(_PATTERN_SPOILERS.search(em.text_content()) for em in self._review_div.iter('em'))
 
-    @property
+    @cached_property
     def rewatch(self) -> bool:
         """
         Returns True if the review has been labelled a rewatch, else False
         """
-        view_date = self.soups['viewing_page'].find('p', class_='view-date').text
+        view_date = self._view_date.text_content()
         return 'Rewatched' in view_date
 
-    @property
+    @cached_property
     def tag(self) -> list:
         """
         Returns a list of tags the review has
         """
-        if not (tags_ul := self.soups['viewing_page'].find('ul', class_='tags')): 
+        if (tags_ul := _first(_XPATH_TAGS, self.soups['viewing_page'])) is None: 
             return list()
-        return [a.text for a in tags_ul.find_all('a')]
+        return [a.text_content() for a in tags_ul.iter('a')]
         # return [a.get('href').split('/')[-3] for a in tags_ul.find_all('a')]
 
 
@@ -353,23 +466,24 @@ class MyViewing(Viewing):
     @classmethod
     def from_link(cls, suburl: str):
 
-        split_suburl = suburl.strip('/').split('film/')[-1].split('/')
+        # (username/film/)film_suburl(/num)
+        film_suburl, _, num = suburl.strip('/').rpartition('film/')[2].partition('/')
 
-        if (num_slashes := len(split_suburl)) > 2:
-            raise ValueError(f"Invalid suburl: {suburl} with unexpected number of slashes: {num_slashes}")
+        if '/' in num:
+            raise ValueError(f"Invalid suburl: {suburl} with unexpected number of slashes: {num.count('/') + 2}")
 
-        return cls(*split_suburl)
+        return cls(film_suburl, int(num) if num else None)
 
     """ 
     ** Updating
     """
 
-    @Viewing.specifiedDate.setter
+    @util.settable(Viewing.specifiedDate).setter
     def specifiedDate(self, value: bool):
         """ Change the specifiedDate (i.e. if True: 'you watched on this day') to True or False """
         self.update(specifiedDate = value)
 
-    @Viewing.viewingDateStr.setter
+    @util.settable(Viewing.viewingDateStr).setter
     def viewingDateStr(self, value: str):
         """ 
         Change the viewingDateStr (i.e. date listed on the Viewing) to a new date
@@ -377,12 +491,7 @@ class MyViewing(Viewing):
         """
         self.update(viewingDateStr = value)
 
-    @Viewing.review.setter
-    def review(self, value: str):
-        """ Change the review text """
-        self.update(review = value)
-
-    @Viewing.containsSpoilers.setter
+    @util.settable(Viewing.containsSpoilers).setter
     def containsSpoilers(self, value: bool):
         """ 
         Change the containsSpoilers variable
@@ -390,12 +499,12 @@ class MyViewing(Viewing):
         """
         self.update(containsSpoilers = value)
 
-    @Viewing.rewatch.setter
+    @util.settable(Viewing.rewatch).setter
     def rewatch(self, value: bool):
         """ Change whether the Viewing is listed as a rewatch """
         self.update(rewatch = value)
 
-    @Viewing.rating.setter
+    @util.settable(Viewing.rating).setter
     def rating(self, value: int):
         """ 
         Change the rating connected to the Viewing 
@@ -403,20 +512,19 @@ class MyViewing(Viewing):
         """
         self.update(rating = value)
 
-    @Viewing.liked.setter
+    @util.settable(Viewing.liked).setter
     def liked(self, value: bool):
         """ Change whether or not you have liked the film """
         self.update(liked = value)
 
-    @Viewing.tag.setter
+    @util.settable(Viewing.tag).setter
     def tag(self, value: list):
         """ Change the tags list associated with the Viewing """
         self.update(tag = value)
 
     def _get_valid_update_arguments(self, **attributes_to_change):
-        data_keys = set([k for k in self.data.keys() if k not in ('viewingId', 'filmId')])
-        arg_keys = set(attributes_to_change.keys())
-        if (invalid_kwargs := arg_keys.difference(data_keys)):
+        data_keys = self._data.keys() - {'viewingId', 'filmId'}
+        if (invalid_kwargs := attributes_to_change.keys() - data_keys):
             raise ValueError(f"Invalid kwargs: {invalid_kwargs}")
 
     def update(self, **attributes_to_change): 
@@ -462,12 +570,14 @@ class MyViewing(Viewing):
             raise LetterboxdError("Diary entries must have specified date!")
 
         # Update any changed attributes
-        data = {k:v if k not in attributes_to_change or k in ('viewingId', 'filmId') else attributes_to_change[k] for k,v in self.data.items()}
+        data = self.data
+        data.update(attributes_to_change)
 
         # Make the update request
         self.session.request('POST', self.suburl_update, data=data)
 
         # Keep attributes up to date
+        # (The POST has cleared the cached soups - see _clear_soups)
         self.update_soups()
 
     def replace_tags(self, tags_find: list, tags_replace: list | None = None) -> None:
@@ -491,37 +601,37 @@ class MyViewing(Viewing):
         ** Overloading ** 
         Update the soups so that data reflects the up to date viewing 
         """
-
-        # Quick lambda function to create soup from a request
-        make_soup = lambda suburl: BeautifulSoup(self.session.request('GET', suburl).text, 'lxml')
-
-        self.soups = dict()
-
-        # Page for viewing the Viewing
-        self.soups['viewing_page'] = make_soup(self.suburl_and_num)
-
-        # Activity page for the film the Viewing is about
-        # Will say for example if you liked and rated the film
-        self.soups['liked_src'] = make_soup(f"{self.suburl}activity/")
+        # Page for viewing the Viewing,
+        # and the activity page for the film the Viewing is about (which will say, for example, if you liked and rated the film)
+        super().update_soups()
 
         # The source of the review text
-        self.soups['review_src'] = make_soup(f"csi/viewing/{self.viewingId}/sidebar-user-actions/?esiAllowUser=true")
-
-        logging.debug(f"Updated soups for viewing:{self.viewingId}")
+        # Its url needs the viewingId (from the viewing page), so it can't be requested alongside the others
+        self.soups['review_src'] = _get_soup(f"csi/viewing/{self.viewingId}/sidebar-user-actions/?esiAllowUser=true")
 
     """
     ** Attributes
     """
 
-    @property
-    def review(self) -> str:
+    @cached_property
+    def _review(self) -> str:
         """ Returns the content of the review """
-        edit_review_button = self.soups['review_src'].find('a', class_='edit-review-button')
-        if not edit_review_button:
+        edit_review_button = _first(_XPATH_EDIT_REVIEW_BUTTON, self.soups['review_src'])
+        if edit_review_button is None:
             return ''
         # Convert any XML character references in the review text, and return it
         return util.from_xml_char_reference(edit_review_button.get('data-review-text'))
 
+    @property
+    def review(self) -> str:
+        """ Returns the content of the review (from the review source, rather than the viewing page) """
+        return self._review
+
+    @review.setter
+    def review(self, value: str):
+        """ Change the review text """
+        self.update(review = value)
+
 
 if __name__ == '__main__':
     pass
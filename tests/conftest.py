@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules in src import one another by name, so src is put on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
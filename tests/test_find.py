@@ -0,0 +1,24 @@
+import requests
+
+import find
+
+
+def make_response(html: str) -> requests.Response:
+    response = requests.Response()
+    response._content = html.encode('utf-8')
+    response.encoding = 'utf-8'
+    return response
+
+
+def test_get_page_films_nested_span():
+    html = (
+        '<html><body><ul class="results">'
+        '<li><span class="film-title-wrapper">'
+        '<a href="/film/2001-a-space-odyssey/">2001: A <span class="y">Space</span> Odyssey </a>'
+        '<small><a href="/films/year/1968/">1968</a></small>'
+        '</span></li>'
+        '</ul></body></html>'
+    )
+    assert list(find.Find._get_page_films(make_response(html))) == [
+        {'name': '2001: A Space Odyssey', 'link': '2001-a-space-odyssey'}
+    ]
@@ -0,0 +1,43 @@
+import pytest
+import requests
+
+import letterboxd
+
+
+@pytest.mark.parametrize('star_rating, expected', [
+    ('half-★', 0.5),
+    ('½', 0.5),
+    ('★', 1.0),
+    ('★★★½', 3.5),
+    (' ★★★★★ ', 5.0),
+    ('½★', 1.5),
+])
+def test_star_rating_to_num(star_rating, expected):
+    assert letterboxd.star_rating_to_num(star_rating) == expected
+
+
+@pytest.mark.parametrize('star_rating', ['', 'x', '★★★★★★'])
+def test_star_rating_to_num_invalid(star_rating):
+    with pytest.raises(ValueError):
+        letterboxd.star_rating_to_num(star_rating)
+
+
+def make_response(html: str) -> requests.Response:
+    response = requests.Response()
+    response._content = html.encode('utf-8')
+    response.encoding = 'utf-8'
+    return response
+
+
+@pytest.mark.parametrize('chunk_size', [8, 16384])
+def test_iter_elements_nested_same_tag(chunk_size):
+    html = (
+        '<html><body><ul class="results">'
+        '<li><span class="film-title-wrapper"><a>X <span class="y">inner</span></a> <small>2001</small></span></li>'
+        '</ul></body></html>'
+    )
+    results = [
+        (span.get('class'), span.text_content())
+        for span in letterboxd.iter_elements(make_response(html), 'span', chunk_size=chunk_size)
+    ]
+    assert results == [('y', 'inner'), ('film-title-wrapper', 'X inner 2001')]
@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+import util
+
+
+def symbol_list_baseline(nums: list, n: int, symbol: str = '|') -> list:
+    max_num = max(nums)
+    return [symbol * round(num / max_num * n) for num in nums]
+
+
+@pytest.mark.parametrize('length', [1, 10, 31, 32, 100, 1000])
+def test_symbol_list_numpy_and_list_paths_agree(length):
+    rng = random.Random(length)
+    nums = [rng.randint(0, 500) for _ in range(length - 1)] + [rng.randint(1, 500)]
+    assert util.symbol_list(nums, 25) == symbol_list_baseline(nums, 25)
+
+
+def test_symbol_list_halves_round_alike():
+    # np.rint and round() both round half to even
+    nums = [1, 3, 5, 7, 9, 10] * 6
+    assert util.symbol_list(nums, 5) == symbol_list_baseline(nums, 5)
+    assert util.symbol_list(nums[:6], 5) == symbol_list_baseline(nums[:6], 5)
+
+
+@pytest.mark.parametrize('length', [5, 32, 100])
+def test_symbol_list_all_zero_raises(length):
+    with pytest.raises(ZeroDivisionError):
+        util.symbol_list([0] * length, 25)